@@ -2,21 +2,46 @@
 # Author: Raoul Comninos
 # pip install pillow send2trash PyMuPDF pytesseract
 import os
+import io
 import sys
+import math
 import shutil
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageChops, ImageColor
 import json
 import fitz  # PyMuPDF for PDF handling
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import subprocess
+import threading
+import queue
+import bisect
+import hashlib
+import multiprocessing
+import concurrent.futures
+from multiprocessing import shared_memory
+from collections import OrderedDict
 try:
     import pytesseract
     PYTESSERACT_AVAILABLE = True
 except ImportError:
     PYTESSERACT_AVAILABLE = False
 
+def pixmap_to_image(pix):
+    """Build a PIL image straight from a PyMuPDF pixmap's samples, without a PPM round trip"""
+    if pix.alpha:
+        mode = {2: 'LA', 4: 'RGBA'}[pix.n]
+    else:
+        mode = {1: 'L', 3: 'RGB'}[pix.n]
+    samples = getattr(pix, 'samples_mv', None) or pix.samples
+    # Gray and RGBA samples are mapped in place (read-only, zero-copy). Pillow stores
+    # RGB padded to four bytes, so RGB samples are unpacked once from the memoryview.
+    image = Image.frombuffer(mode, (pix.width, pix.height), samples, 'raw', mode, pix.stride, 1)
+    if image.readonly:
+        # The image still points into the pixmap's memory, which must outlive it
+        image._pixmap = pix
+    return image
+
 class SignatureManagerDialog:
     def __init__(self, parent, signatures_dict, sizes_dict, default_size=100):
         self.parent = parent
@@ -236,6 +261,1979 @@ class SignatureManagerDialog:
         self.result = None
         self.dialog.destroy()
 
+class PagePrefetcher:
+    """Render the pages around the current one on the render engine into the page cache"""
+    
+    def __init__(self, cache, engine, window=2, full_page_limit=16000000):
+        self.cache = cache
+        self.engine = engine
+        self.window = window  # Pages to look ahead (and behind) of the current page
+        self.full_page_limit = full_page_limit  # Bigger displays are rendered per tile, nothing to prefetch
+        self._pending = {}  # cache key -> RenderFuture, only touched by the UI thread
+        
+    def cancel(self):
+        """Drop all queued prefetches (renders already running still complete)"""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+        
+    def schedule(self, filename, current_page, total_pages, zoom, generation, scale_for_page, color_mode='color'):
+        """Replace queued work with the neighbours of current_page, nearest (and forward) first"""
+        wanted = {}
+        for distance in range(1, self.window + 1):
+            for page_num in (current_page + distance, current_page - distance):
+                if not 0 <= page_num < total_pages:
+                    continue
+                # Same key PdfPageSource.render_page looks up
+                render_scale = scale_for_page(page_num)
+                key = (filename, page_num, round(render_scale * zoom, 4), generation)
+                if self.cache.contains(key):
+                    continue
+                future = self._pending.pop(key, None)  # Keep requests that are still wanted
+                if future is None:
+                    future = self.engine.submit(filename, page_num, generation, render_scale, zoom,
+                                                max_pixels=self.full_page_limit, color_mode=color_mode)
+                    future.add_done_callback(lambda done, key=key: self._store(key, done))
+                wanted[key] = future
+        self.cancel()
+        self._pending = wanted
+        
+    def wait_for(self, key, timeout=10.0):
+        """If key is being prefetched, wait for it rather than rendering the page a second time"""
+        future = self._pending.get(key)
+        if future is None or future.cancelled():
+            return
+        try:
+            image = future.result(timeout)
+        except Exception:
+            return
+        if image is not None:
+            # Done-callbacks run after waiters wake, so make sure the cache has it now
+            self.cache.put(key, image)
+            
+    def _store(self, key, future):
+        """Put a finished prefetch into the cache (runs on the engine's thread)"""
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"DEBUG: Prefetch of page {key[1] + 1} failed: {future.exception()}")
+            return
+        image = future.result()
+        if image is not None:
+            self.cache.put(key, image)
+
+class FilePrefetcher:
+    """Decode the neighbouring entries of the file list on a worker thread into the page cache"""
+    
+    def __init__(self, cache, engine, max_item_bytes):
+        self.cache = cache
+        self.engine = engine  # PDF first pages are rasterized on the render engine
+        self.max_item_bytes = max_item_bytes  # Larger files are left to load on demand
+        self._jobs = queue.Queue()
+        self._token = 0  # Bumped to cancel everything queued so far
+        self._thread = None
+        self._busy = threading.Condition()
+        self._in_progress = None  # Cache key the worker is producing right now
+        
+    def cancel(self):
+        """Drop all queued prefetches (a decode already in progress still completes)"""
+        self._token += 1
+        
+    def schedule(self, jobs):
+        """Replace queued work with jobs of (kind, filename, cache_key, extra)"""
+        self.cancel()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+        for job in jobs:
+            self._jobs.put((self._token,) + job)
+            
+    def wait_for(self, key, timeout=10.0):
+        """Block until the worker has finished key if it is the one being produced"""
+        with self._busy:
+            self._busy.wait_for(lambda: self._in_progress != key, timeout)
+            
+    def _worker(self):
+        """Decode queued files (runs on a background thread)"""
+        while True:
+            token, kind, filename, key, extra = self._jobs.get()
+            if token != self._token:
+                continue
+            try:
+                if kind == 'pdf':
+                    # The key depends on the page's render scale, known once the file is open
+                    key, extra = self._first_page_job(filename, *extra)
+                    if key is None:
+                        continue
+                if self.cache.contains(key):
+                    continue
+            except Exception as e:
+                print(f"DEBUG: Prefetch of {os.path.basename(filename)} failed: {e}")
+                continue
+            with self._busy:
+                self._in_progress = key
+            try:
+                if kind == 'image':
+                    self._decode_image(filename, key, extra)
+                else:
+                    self._render_pdf(filename, key, *extra)
+            except Exception as e:
+                print(f"DEBUG: Prefetch of {os.path.basename(filename)} failed: {e}")
+            finally:
+                with self._busy:
+                    self._in_progress = None
+                    self._busy.notify_all()
+                    
+    def _decode_image(self, filename, key, color_mode):
+        """Decode an image file if it fits the per-item memory bound"""
+        with Image.open(filename) as probe:
+            width, height = probe.size
+        if width * height * 4 > self.max_item_bytes:
+            return
+        self.cache.put(key, decode_image_file(filename, color_mode))
+        
+    def _first_page_job(self, filename, zoom, pixel_budget, generation, color_mode):
+        """Return the cache key and render arguments for a PDF's first page, or (None, None)"""
+        document = fitz.open(filename)
+        try:
+            if document.needs_pass and not document.authenticate(self.engine.get_password(filename) or ""):
+                return None, None  # Needs a password we don't have yet - load_pdf will ask
+            render_scale = adaptive_render_scale(document[0].rect, pixel_budget)
+        finally:
+            document.close()
+        # Same key PdfPageSource uses for the first page at that zoom
+        return (filename, 0, round(render_scale * zoom, 4), generation), (zoom, render_scale, color_mode)
+        
+    def _render_pdf(self, filename, key, zoom, render_scale, color_mode):
+        """Rasterize the first page of a PDF at the zoom it will be opened with"""
+        image = self.engine.submit(filename, 0, key[3], render_scale, zoom,
+                                   max_pixels=self.max_item_bytes // 4, color_mode=color_mode).result()
+        if image is not None:
+            self.cache.put(key, image)
+
+class ThumbnailCache:
+    """Small page previews made on a worker thread and kept on disk, keyed by file content"""
+    
+    def __init__(self, engine, cache_dir, size=(120, 160), memory_items=300, disk_budget_bytes=64 * 1024 * 1024):
+        self.engine = engine  # PDF pages are rasterized on the render engine
+        self.cache_dir = cache_dir
+        self.size = size  # Bounding box of a thumbnail in pixels
+        self.memory_items = memory_items  # Thumbnails kept in memory, least recently used dropped
+        self.disk_budget_bytes = disk_budget_bytes  # Size cap of the cache directory
+        self.images = OrderedDict()  # (file, page, generation) -> PIL image
+        self._disk_entries = None  # path -> nbytes, least recently used first; scanned on first use
+        self._disk_bytes = 0
+        self._file_paths = {}  # file -> cache files read or written for it this session
+        self.finished = queue.Queue()  # Keys done by the worker, collected by the UI thread
+        self.outstanding = 0  # Requests not collected yet (UI thread only)
+        self._jobs = queue.Queue()
+        self._tokens = {}  # channel -> token, bumped to drop that channel's queued requests
+        self._thread = None
+        self._encrypted = {}  # file -> whether it needs a password (never written to disk)
+        self._lock = threading.Lock()
+        
+    def get(self, filename, page_num, generation):
+        """Return a thumbnail already in memory, or None"""
+        key = (filename, page_num, generation)
+        with self._lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+            return image
+            
+    def request(self, filename, page_num, generation, channel):
+        """Queue a thumbnail; the key shows up in finished when it is ready"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+        self._jobs.put((channel, self._tokens.get(channel, 0), filename, page_num, generation))
+        self.outstanding += 1
+        
+    def cancel(self, channel):
+        """Drop the queued requests of one channel (e.g. pages that scrolled out of the sidebar)"""
+        self._tokens[channel] = self._tokens.get(channel, 0) + 1
+        
+    def _worker(self):
+        """Load or make queued thumbnails (runs on a background thread)"""
+        while True:
+            channel, token, filename, page_num, generation = self._jobs.get()
+            key = (filename, page_num, generation)
+            if token == self._tokens.get(channel, 0) and self.get(*key) is None:
+                try:
+                    image = self._load_or_make(filename, page_num, generation)
+                    if image is not None:
+                        with self._lock:
+                            self.images[key] = image
+                            while len(self.images) > self.memory_items:
+                                self.images.popitem(last=False)
+                except Exception as e:
+                    print(f"DEBUG: Thumbnail of {os.path.basename(filename)} page {page_num + 1} failed: {e}")
+            # Always report back so the UI thread knows when to stop polling
+            self.finished.put((channel, key))
+            
+    def forget_file(self, filename):
+        """Drop the thumbnails of a file's previous contents, in memory and on disk (after a rewrite)"""
+        with self._lock:
+            for key in [key for key in self.images if key[0] == filename]:
+                del self.images[key]
+            paths = self._file_paths.pop(filename, set())
+            for path in paths:
+                if self._disk_entries is not None and path in self._disk_entries:
+                    self._disk_bytes -= self._disk_entries.pop(path)
+        self._encrypted.pop(filename, None)
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+                
+    def _scan_disk(self):
+        """Build the list of cache files, oldest first, from the directory (lock held)"""
+        found = []
+        try:
+            for subdir in os.scandir(self.cache_dir):
+                if subdir.is_dir():
+                    for entry in os.scandir(subdir.path):
+                        if entry.name.endswith(".png"):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.path, stat.st_size))
+        except FileNotFoundError:
+            pass
+        self._disk_entries = OrderedDict((path, nbytes) for _mtime, path, nbytes in sorted(found))
+        self._disk_bytes = sum(self._disk_entries.values())
+        
+    def _touch_disk(self, filename, path, nbytes=None):
+        """Record a cache file as just used (or just written), evicting the oldest over the budget"""
+        evicted = []
+        with self._lock:
+            if self._disk_entries is None:
+                self._scan_disk()
+            self._file_paths.setdefault(filename, set()).add(path)
+            if nbytes is not None:
+                self._disk_bytes += nbytes - self._disk_entries.get(path, 0)
+                self._disk_entries[path] = nbytes
+            elif path in self._disk_entries:
+                try:
+                    os.utime(path)  # The mtime orders the files for the next session's scan
+                except OSError:
+                    pass
+            if path in self._disk_entries:
+                self._disk_entries.move_to_end(path)
+            while self._disk_bytes > self.disk_budget_bytes and len(self._disk_entries) > 1:
+                old_path, old_bytes = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= old_bytes
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+                
+    def _disk_path(self, filename, page_num):
+        """Return the cache file for a page, named by a hash of the file's content and mtime"""
+        name = hashlib.sha1(f"{file_fingerprint(filename)}:{page_num}:{self.size}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, name[:2], name + ".png")
+        
+    def _load_or_make(self, filename, page_num, generation):
+        """Read a thumbnail from the disk cache, or render it and store it there"""
+        is_pdf = os.path.splitext(filename)[1].lower() == '.pdf'
+        if is_pdf and filename not in self._encrypted:
+            self._encrypted[filename] = pdf_needs_password(filename)
+        # Pages of encrypted PDFs must not end up readable in the cache directory
+        use_disk = not (is_pdf and self._encrypted[filename])
+        
+        path = self._disk_path(filename, page_num) if use_disk else None
+        if path is not None and os.path.exists(path):
+            try:
+                with Image.open(path) as cached:
+                    image = cached.convert('RGB')
+                self._touch_disk(filename, path)
+                return image
+            except Exception:
+                pass  # Damaged entry - make it again
+                
+        if is_pdf:
+            # Low-DPI render (about 14 dpi) shrunk to fit, on the shared render engine
+            image = self.engine.submit(filename, page_num, generation, render_scale=0.2,
+                                       max_pixels=4000000).result()
+            if image is None:
+                return None
+        else:
+            image = Image.open(filename)
+            image.draft('RGB', self.size)  # JPEGs decode at reduced size directly
+            image = image.convert('RGB')
+        image.thumbnail(self.size, Image.Resampling.LANCZOS)
+        
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(temp_path, "PNG")
+            os.replace(temp_path, path)
+            self._touch_disk(filename, path, os.path.getsize(path))
+        return image
+
+class ImagePyramid:
+    """Mip-map levels (1/2, 1/4, 1/8 ...) of a page image, built lazily once per page"""
+    
+    progressive = True  # Tiles get a fast preview first and a LANCZOS pass in the background
+    
+    def __init__(self, image, min_size=64):
+        self.min_size = min_size  # Stop halving once a level gets this small
+        self.levels = [image]
+        
+    @property
+    def base(self):
+        return self.levels[0]
+        
+    @property
+    def width(self):
+        return self.levels[0].width
+        
+    @property
+    def height(self):
+        return self.levels[0].height
+        
+    def _build_level(self, index):
+        """Make sure levels up to index exist, returning False if the page is too small"""
+        while len(self.levels) <= index:
+            previous = self.levels[-1]
+            if min(previous.width, previous.height) < self.min_size * 2:
+                return False
+            # reduce() is a fast box filter, good enough for the intermediate levels
+            self.levels.append(previous.reduce(2))
+        return True
+        
+    def level_for_zoom(self, zoom):
+        """Return (image, scale_x, scale_y) of the smallest level at least as large as zoom"""
+        index = 0
+        while zoom <= 0.5 ** (index + 1) and self._build_level(index + 1):
+            index += 1
+        level = self.levels[index]
+        return level, level.width / self.width, level.height / self.height
+        
+    def render_region(self, box, size, zoom, resample=Image.Resampling.LANCZOS):
+        """Resample box (base coordinates) at zoom from the nearest larger level"""
+        level, scale_x, scale_y = self.level_for_zoom(zoom)
+        # A fractional source box keeps neighbouring tiles seamless at any zoom
+        level_box = (box[0] * scale_x, box[1] * scale_y,
+                     min(box[2] * scale_x, level.width), min(box[3] * scale_y, level.height))
+        return level.resize(size, resample, box=level_box)
+
+def adaptive_render_scale(page_rect, pixel_budget, max_scale=2.0):
+    """Pick the edit-buffer scale for a page: 2x (144 dpi) unless that would exceed pixel_budget"""
+    area = max(page_rect.width * page_rect.height, 1.0)
+    return min(max_scale, math.sqrt(pixel_budget / area))
+
+class PageTransform:
+    """Maps a page's edit-buffer pixels to PDF points and back"""
+    
+    def __init__(self, scale, origin=(0.0, 0.0)):
+        self.scale = scale  # Edit-buffer pixels per PDF point
+        self.origin = origin  # Top-left of the page rect in PDF coordinates
+        
+    def to_pdf(self, x, y):
+        """Convert an edit-buffer point to PDF coordinates"""
+        return self.origin[0] + x / self.scale, self.origin[1] + y / self.scale
+        
+    def to_pdf_length(self, length):
+        """Convert a width, height or font size in edit-buffer pixels to PDF points"""
+        return length / self.scale
+        
+    def to_pixels(self, x, y):
+        """Convert a PDF point to edit-buffer coordinates"""
+        return (x - self.origin[0]) * self.scale, (y - self.origin[1]) * self.scale
+
+def page_pixel_size(page, scale):
+    """Return the (width, height) in pixels of a fitz page rendered at scale"""
+    size = (page.rect * fitz.Matrix(scale, scale)).irect
+    return size.width, size.height
+
+def rasterize_page(page, matrix, size, clip=None, gray=False):
+    """Render a fitz page or DisplayList (or a clip of it) to an RGB (or L) image of exactly the requested size"""
+    colorspace = fitz.csGRAY if gray else fitz.csRGB
+    pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False, colorspace=colorspace)
+    image = pixmap_to_image(pix)
+    mode = 'L' if gray else 'RGB'
+    if image.mode != mode:
+        image = image.convert(mode)
+    if image.size != size:
+        # MuPDF rounds the pixmap outwards; absorb the odd pixel so tiles line up
+        image = image.resize(size, Image.Resampling.BILINEAR)
+    return image
+
+def render_page_box(page, render_scale, box, size, gray=False):
+    """Render box (pixel coordinates at render_scale) of a fitz page to an image of the given size"""
+    s = render_scale
+    page_rect = page.rect
+    clip = fitz.Rect(page_rect.x0 + box[0] / s, page_rect.y0 + box[1] / s,
+                     page_rect.x0 + box[2] / s, page_rect.y0 + box[3] / s)
+    mat = fitz.Matrix(size[0] / (box[2] - box[0]) * s, size[1] / (box[3] - box[1]) * s)
+    return rasterize_page(page, mat, size, clip=clip, gray=gray)
+
+def page_is_grayscale(page):
+    """Guess whether a PDF page is a gray or black-and-white scan: only gray images, no drawings, no colour on it"""
+    images = page.get_images(full=True)
+    if not images:
+        return False
+    for image in images:
+        xref, bpc, colorspace = image[0], image[4], image[5]
+        if colorspace in ('DeviceGray', 'CalGray'):
+            continue
+        # Stencil masks (1 bit, no colour space) are painted in the fill colour, usually black
+        if bpc == 1 and not colorspace:
+            continue
+        if colorspace == 'ICCBased' and _icc_components(page.parent, xref) == 1:
+            continue
+        return False
+    if page.get_drawings():
+        return False
+    # Text colour, shadings and annotations aren't listed with the images - a coarse RGB render shows them
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5), colorspace=fitz.csRGB, alpha=False)
+    return image_is_grayscale(Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples))
+
+def _icc_components(document, image_xref):
+    """Return the component count of an image's ICCBased colour space, or None"""
+    kind, value = document.xref_get_key(image_xref, "ColorSpace")
+    if kind == 'xref':
+        value = document.xref_object(int(value.split()[0]))
+    tokens = value.replace('[', ' ').replace(']', ' ').split()
+    # [/ICCBased 12 0 R] - the profile stream carries /N
+    if len(tokens) >= 4 and tokens[0] == '/ICCBased' and tokens[3] == 'R':
+        kind, components = document.xref_get_key(int(tokens[1]), "N")
+        if kind == 'int':
+            return int(components)
+    return None
+
+def render_in_gray(page, color_mode):
+    """Decide whether a page is rendered to an 'L' buffer under a color mode ('auto', 'color' or 'gray')"""
+    if color_mode == 'gray':
+        return True
+    return color_mode == 'auto' and page_is_grayscale(page)
+
+def is_gray_color(color):
+    """Check whether a colour name or hex string is a shade of gray"""
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return r == g == b
+
+def image_is_grayscale(image):
+    """Check whether every pixel of an RGB image has equal channels"""
+    r, g, b = image.split()
+    return ImageChops.difference(r, g).getbbox() is None and ImageChops.difference(g, b).getbbox() is None
+
+def file_fingerprint(filename):
+    """Hash a file's size, mtime and first and last 64 KiB - cheap, and changes when the file does"""
+    stat = os.stat(filename)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(filename, 'rb') as f:
+        # Head and tail are enough to tell files apart without reading whole productions
+        digest.update(f.read(65536))
+        if stat.st_size > 131072:
+            f.seek(-65536, os.SEEK_END)
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def pdf_needs_password(filename):
+    """Check whether a PDF file is encrypted"""
+    document = fitz.open(filename)
+    try:
+        return document.needs_pass
+    finally:
+        document.close()
+
+# Documents opened by this process when it serves as a render engine worker,
+# keyed by (file, generation) so a rewritten file is reopened. Only the most
+# recently used few stay open, so a long review session doesn't run out of file descriptors.
+_engine_documents = OrderedDict()
+_engine_max_documents = 8
+_engine_display_lists = None  # DisplayListCache of this worker, sized by the first request
+_engine_gray_pages = OrderedDict()  # (filename, page, generation) -> whether 'auto' renders the page in gray
+_engine_max_gray_pages = 4096
+
+def _engine_close_document(key):
+    """Close one of this worker's documents and drop its recorded pages"""
+    _engine_documents.pop(key).close()
+    if _engine_display_lists is not None:
+        _engine_display_lists.invalidate_file(key[0])
+        
+def _engine_open_document(filename, password, generation):
+    """Return this worker's copy of a document, closing older generations and the least recently used files"""
+    key = (filename, generation)
+    document = _engine_documents.get(key)
+    if document is not None:
+        _engine_documents.move_to_end(key)
+        return document
+        
+    for old_key in [k for k in _engine_documents if k[0] == filename]:
+        _engine_close_document(old_key)
+    document = fitz.open(filename)
+    if document.needs_pass and not document.authenticate(password or ""):
+        document.close()
+        raise ValueError(f"Missing or incorrect password for {os.path.basename(filename)}")
+    _engine_documents[key] = document
+    while len(_engine_documents) > _engine_max_documents:
+        _engine_close_document(next(iter(_engine_documents)))
+    return document
+
+def _engine_render(request, use_shared_memory):
+    """Render one request in a render engine worker; returns an image, or (shm name, size) from a pool process"""
+    global _engine_display_lists
+    (filename, password, generation, page_num, render_scale, zoom, box, size, max_pixels,
+     display_list_budget, color_mode) = request
+    page = _engine_open_document(filename, password, generation)[page_num]
+    gray = color_mode == 'gray'
+    if color_mode == 'auto':
+        page_key = (filename, page_num, generation)
+        gray = _engine_gray_pages.get(page_key)
+        if gray is None:
+            gray = _engine_gray_pages[page_key] = page_is_grayscale(page)
+            while len(_engine_gray_pages) > _engine_max_gray_pages:
+                _engine_gray_pages.popitem(last=False)
+        else:
+            _engine_gray_pages.move_to_end(page_key)
+    if display_list_budget:
+        if _engine_display_lists is None:
+            _engine_display_lists = DisplayListCache(display_list_budget)
+        page = _engine_display_lists.get((filename, page_num, generation), page)
+    if box is None:
+        if size is None:
+            width, height = page_pixel_size(page, render_scale)
+            size = (max(1, int(width * zoom)), max(1, int(height * zoom)))
+        if max_pixels and size[0] * size[1] > max_pixels:
+            return None
+        scale = render_scale * zoom
+        image = rasterize_page(page, fitz.Matrix(scale, scale), size, gray=gray)
+    else:
+        image = render_page_box(page, render_scale, box, size, gray=gray)
+    if not use_shared_memory:
+        return image
+        
+    # Hand the pixels back through shared memory instead of pickling them down the pipe;
+    # the parent unlinks the block once it has copied the image out
+    data = image.tobytes()
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    block.buf[:len(data)] = data
+    block.close()
+    return block.name, image.size, image.mode
+
+def _engine_ping():
+    """No-op job used to start pool processes ahead of the first real render"""
+    return os.getpid()
+
+class RenderFuture(concurrent.futures.Future):
+    """Future for a RenderEngine request; cancelling it also withdraws the queued job"""
+    
+    def __init__(self):
+        super().__init__()
+        self.job = None  # Underlying pool or thread future
+        
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+        return super().cancel()
+
+class RenderEngine:
+    """Rasterize PDF pages on a pool of worker processes, each keeping its own documents open"""
+    
+    # MuPDF holds the GIL while rendering, so threads don't scale; separate
+    # processes do. With no pool (one core, or processes=0) requests run on a
+    # single background thread of this process instead.
+    
+    def __init__(self, processes=None, get_password=None, display_list_budget=0):
+        if processes is None:
+            processes = min(4, (os.cpu_count() or 1) - 1)
+        self.processes = max(0, processes)
+        self.get_password = get_password or (lambda filename: None)
+        self.display_list_budget = display_list_budget  # Per-worker DisplayListCache limit, 0 disables
+        self._pool = None
+        self._thread_pool = None
+        
+    @property
+    def uses_processes(self):
+        return self.processes > 0
+        
+    def start(self):
+        """Start the worker processes in the background so the first render doesn't pay for it"""
+        pool = self._executor()
+        if self.uses_processes:
+            for _ in range(self.processes):
+                pool.submit(_engine_ping)
+                
+    def _executor(self):
+        """Return the process pool, or the in-process fallback thread"""
+        if self.uses_processes and self._pool is None:
+            try:
+                context = multiprocessing.get_context('spawn')  # fork is unsafe with Tk and MuPDF state
+                self._pool = concurrent.futures.ProcessPoolExecutor(self.processes, mp_context=context)
+            except (OSError, ValueError, NotImplementedError) as e:
+                print(f"DEBUG: Render processes unavailable, rendering in-process: {e}")
+                self.processes = 0
+        if self.uses_processes:
+            return self._pool
+        if self._thread_pool is None:
+            self._thread_pool = concurrent.futures.ThreadPoolExecutor(1)
+        return self._thread_pool
+        
+    def submit(self, filename, page_num, generation, render_scale=2.0, zoom=1.0, box=None, size=None,
+               max_pixels=None, color_mode='color'):
+        """Queue a render of a whole page (box=None) or of box at render_scale pixels; returns a RenderFuture"""
+        request = (filename, self.get_password(filename), generation, page_num, render_scale, zoom,
+                   box, size, max_pixels, self.display_list_budget, color_mode)
+        future = RenderFuture()
+        self._dispatch(request, future)
+        return future
+        
+    def render(self, *args, **kwargs):
+        """Render synchronously (see submit)"""
+        return self.submit(*args, **kwargs).result()
+        
+    def _dispatch(self, request, future):
+        """Send a request to the current executor, falling back in-process if the pool is broken"""
+        use_shared_memory = self.uses_processes
+        try:
+            job = self._executor().submit(_engine_render, request, use_shared_memory)
+        except concurrent.futures.process.BrokenProcessPool:
+            self._abandon_pool()
+            self._dispatch(request, future)
+            return
+        future.job = job
+        job.add_done_callback(lambda done: self._collect(request, future, done, use_shared_memory))
+        
+    def _collect(self, request, future, job, use_shared_memory):
+        """Turn a finished job into the RenderFuture's image"""
+        if job.cancelled():
+            return
+        try:
+            result = job.result()
+        except concurrent.futures.process.BrokenProcessPool:
+            self._abandon_pool()
+            if not future.cancelled():
+                self._dispatch(request, future)
+            return
+        except Exception as e:
+            self._resolve(future, exception=e)
+            return
+        if use_shared_memory and result is not None:
+            name, size, mode = result
+            block = shared_memory.SharedMemory(name=name)
+            try:
+                result = Image.frombytes(mode, size, block.buf)
+            finally:
+                block.close()
+                block.unlink()
+        self._resolve(future, result=result)
+        
+    def _resolve(self, future, result=None, exception=None):
+        """Complete a RenderFuture unless it was cancelled in the meantime"""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except concurrent.futures.InvalidStateError:
+            pass  # Cancelled while the job was running
+            
+    def _abandon_pool(self):
+        """Stop using a crashed pool and render in-process from now on"""
+        print("DEBUG: Render process pool broke, rendering in-process")
+        pool, self._pool = self._pool, None
+        self.processes = 0
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            
+    def shutdown(self):
+        """Stop the worker processes and thread"""
+        for executor in (self._pool, self._thread_pool):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._thread_pool = None
+
+def decode_image_file(filename, color_mode='color'):
+    """Open an image file and decode it fully to RGB, or to L for gray and bilevel scans"""
+    image = Image.open(filename)
+    source_mode = image.mode
+    if source_mode == 'L' and color_mode != 'color':
+        image.load()
+    elif source_mode == '1' and color_mode != 'color':
+        # Pillow stores bilevel pixels a byte each anyway, and L resamples properly
+        image = image.convert('L')
+    elif color_mode == 'gray':
+        image = image.convert('L')
+    elif source_mode != 'RGB':
+        image = image.convert('RGB')
+    else:
+        image.load()
+    if color_mode == 'auto' and image.mode == 'RGB' and image_is_grayscale(image):
+        image = image.convert('L')  # Gray scan saved as RGB - lossless to drop the channels
+    image.info['source_mode'] = source_mode  # Lets a save write a bilevel scan back as bilevel
+    return image
+
+def image_nbytes(image):
+    """Approximate memory held by a PIL image (Pillow pads RGB to four bytes per pixel)"""
+    bytes_per_pixel = 1 if image.mode in ('1', 'L', 'P') else 4
+    return image.width * image.height * bytes_per_pixel
+
+class DiskRenderCache:
+    """Rendered PDF pages kept on disk across sessions, under a size cap with LRU eviction"""
+    
+    def __init__(self, cache_dir, budget_bytes, allow_encrypted=False):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.allow_encrypted = allow_encrypted  # Off by default: decrypted pages never touch the disk
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.entries = OrderedDict()  # file name -> (nbytes, sha1 of the file), least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+        self._fingerprints = {}  # (file, size, mtime) -> fingerprint
+        self._encrypted = {}  # file -> whether it needs a password
+        self._stale_generations = {}  # file -> generation below which queued writes are dropped
+        self._writes = queue.Queue()
+        self._writer = None
+        self._load_index()
+        
+    def _load_index(self):
+        """Read the entry list written by the previous session, dropping entries whose file is gone"""
+        try:
+            with open(self.index_path, 'r') as f:
+                for name, nbytes, checksum in json.load(f).get("entries", []):
+                    if os.path.exists(os.path.join(self.cache_dir, name)):
+                        self.entries[name] = (nbytes, checksum)
+                        self.total_bytes += nbytes
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not load disk render cache index: {e}")
+            
+    def save_index(self):
+        """Write the entry list (in LRU order) so the next session can reuse the pages"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self.lock:
+                entries = [[name, nbytes, checksum] for name, (nbytes, checksum) in self.entries.items()]
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({"entries": entries}, f)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            print(f"Could not save disk render cache index: {e}")
+            
+    def _entry_name(self, key):
+        """Map a page cache key to a cache file name, or None if the page mustn't be stored"""
+        filename, page_num, scale = key[0], key[1], key[2]
+        if os.path.splitext(filename)[1].lower() != '.pdf':
+            return None  # Images are files already; decoding them is as fast as reading a copy
+        try:
+            stat = os.stat(filename)
+            stamp = (filename, stat.st_size, stat.st_mtime_ns)
+            with self.lock:
+                fingerprint = self._fingerprints.get(stamp)
+            if fingerprint is None:
+                fingerprint = file_fingerprint(filename)  # Reads the file - not under the lock
+                with self.lock:
+                    self._fingerprints[stamp] = fingerprint
+            if not self.allow_encrypted:
+                if filename not in self._encrypted:
+                    self._encrypted[filename] = pdf_needs_password(filename)
+                if self._encrypted[filename]:
+                    return None
+        except Exception:
+            return None
+        return f"{fingerprint[:2]}/{fingerprint}-{page_num}-{scale:.4f}.png"
+        
+    def get(self, key):
+        """Return the stored image for a page cache key, or None; damaged entries are discarded"""
+        name = self._entry_name(key)
+        if name is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return None
+            self.entries.move_to_end(name)
+        try:
+            with open(os.path.join(self.cache_dir, name), 'rb') as f:
+                data = f.read()
+            if hashlib.sha1(data).hexdigest() != entry[1]:
+                raise ValueError("checksum mismatch")
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception as e:
+            print(f"DEBUG: Dropping damaged disk cache entry {name}: {e}")
+            self._remove(name)
+            return None
+        self.hits += 1
+        return image
+        
+    def put(self, key, image):
+        """Queue a page image to be written in the background"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_worker, daemon=True)
+            self._writer.start()
+        self._writes.put((key, image))
+        
+    def _write_worker(self):
+        """Encode and store queued pages (runs on a background thread)"""
+        while True:
+            key, image = self._writes.get()
+            if key[3] < self._stale_generations.get(key[0], 0):
+                continue  # Rendered before the file was rewritten - it would be stored under the new content
+            name = self._entry_name(key)
+            if name is None:
+                continue
+            with self.lock:
+                if name in self.entries:
+                    continue
+            try:
+                buffer = io.BytesIO()
+                image.save(buffer, "PNG", compress_level=1)  # Favour speed; pages compress well anyway
+                data = buffer.getvalue()
+                path = os.path.join(self.cache_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception as e:
+                print(f"DEBUG: Could not write disk cache entry {name}: {e}")
+                continue
+            with self.lock:
+                self.entries[name] = (len(data), hashlib.sha1(data).hexdigest())
+                self.total_bytes += len(data)
+                evicted = self._evict()
+            for old_name in evicted:
+                self._delete_file(old_name)
+            if self._writes.empty():
+                self.save_index()
+                
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget (lock held)"""
+        evicted = []
+        while self.total_bytes > self.budget_bytes and self.entries:
+            name, (nbytes, _checksum) = self.entries.popitem(last=False)
+            self.total_bytes -= nbytes
+            evicted.append(name)
+        return evicted
+        
+    def _remove(self, name):
+        """Forget one entry and delete its file"""
+        with self.lock:
+            entry = self.entries.pop(name, None)
+            if entry is not None:
+                self.total_bytes -= entry[0]
+        self._delete_file(name)
+        
+    def _delete_file(self, name):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+            
+    def forget_file(self, filename, generation):
+        """Delete the stored pages of a file's previous contents (after it was rewritten)"""
+        self._stale_generations[filename] = generation
+        with self.lock:
+            stamps = [stamp for stamp in self._fingerprints if stamp[0] == filename]
+            fingerprints = {self._fingerprints.pop(stamp) for stamp in stamps}
+            names = [name for name in self.entries
+                     if name.split('/')[-1].split('-')[0] in fingerprints]
+            for name in names:
+                self.total_bytes -= self.entries.pop(name)[0]
+        self._encrypted.pop(filename, None)
+        for name in names:
+            self._delete_file(name)
+        if names:
+            print(f"DEBUG: Deleted {len(names)} disk cache pages of the old {os.path.basename(filename)}")
+            self.save_index()
+            
+    def set_budget(self, budget_bytes):
+        """Change the size cap, deleting least recently used pages if it shrank"""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            evicted = self._evict()
+        for name in evicted:
+            self._delete_file(name)
+        self.save_index()
+        
+    def clear(self):
+        """Delete every stored page"""
+        with self.lock:
+            names = list(self.entries)
+            self.entries.clear()
+            self.total_bytes = 0
+        for name in names:
+            self._delete_file(name)
+        self.save_index()
+        
+    def stats_text(self):
+        """One-line summary for the status bar"""
+        with self.lock:
+            return (f"disk: {len(self.entries)} pages, {self.total_bytes / 1048576:.0f}/"
+                    f"{self.budget_bytes / 1048576:.0f} MB, {self.hits} hits")
+
+class PageRenderCache:
+    """Byte-budgeted LRU cache of rendered pages keyed by (file, page, render scale, generation)"""
+    
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # key -> (image, nbytes), least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()  # Background renderers insert from other threads
+        self.disk = None  # Optional DiskRenderCache behind this one
+        
+    def get(self, key):
+        """Return the cached image for key (marking it recently used) or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        disk = self.disk
+        if disk is None:
+            return None
+        image = disk.get(key)
+        if image is not None:
+            self._store(key, image)
+        return image
+            
+    def contains(self, key):
+        """Check for key without touching the statistics or the LRU order"""
+        with self.lock:
+            return key in self.entries
+            
+    def put(self, key, image):
+        """Store an image, evicting least recently used pages to stay within the budget"""
+        if self.disk is not None:
+            self.disk.put(key, image)
+        self._store(key, image)
+        
+    def _store(self, key, image):
+        """Keep an image in memory only"""
+        nbytes = image_nbytes(image)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            if nbytes > self.budget_bytes:
+                return  # Larger than the whole budget - not worth evicting everything for
+            self.entries[key] = (image, nbytes)
+            self.total_bytes += nbytes
+            self._evict()
+            
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget (lock held)"""
+        while self.total_bytes > self.budget_bytes and self.entries:
+            _key, (_image, nbytes) = self.entries.popitem(last=False)
+            self.total_bytes -= nbytes
+            self.evictions += 1
+            
+    def set_budget(self, budget_bytes):
+        """Change the memory budget, evicting immediately if it shrank"""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+            
+    def invalidate_file(self, filename):
+        """Forget every cached page of a file (after it changed on disk)"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == filename]:
+                self.total_bytes -= self.entries.pop(key)[1]
+                
+    def clear(self):
+        """Forget all cached pages"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            
+    def stats_text(self):
+        """One-line summary for the status bar"""
+        with self.lock:
+            text = (f"Render cache: {len(self.entries)} pages, "
+                    f"{self.total_bytes / 1048576:.0f}/{self.budget_bytes / 1048576:.0f} MB, "
+                    f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions")
+        if self.disk is not None:
+            text += "; " + self.disk.stats_text()
+        return text
+
+def estimate_display_list_bytes(page):
+    """Rough memory held by a page's display list: its content stream plus its decoded images"""
+    # MuPDF doesn't report display list sizes; drawing commands take a few times
+    # the size of the content stream and images are held decoded
+    nbytes = 65536 + 4 * len(page.read_contents())
+    for image in page.get_images():
+        nbytes += image[2] * image[3] * 4
+    return nbytes
+
+class DisplayListCache:
+    """fitz.DisplayLists of recently viewed pages, so new zooms and clips skip content-stream parsing"""
+    
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # (file, page, generation) -> (document, display list, nbytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        
+    def get(self, key, page):
+        """Return the display list for page, recording it on first use"""
+        with self.lock:
+            entry = self.entries.get(key)
+            # A list made from a document that was since closed and reopened is unusable
+            if entry is not None and entry[0] is page.parent:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            
+        display_list = page.get_displaylist()
+        nbytes = estimate_display_list_bytes(page)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[2]
+            if nbytes <= self.budget_bytes:
+                self.entries[key] = (page.parent, display_list, nbytes)
+                self.total_bytes += nbytes
+                while self.total_bytes > self.budget_bytes and self.entries:
+                    self.total_bytes -= self.entries.popitem(last=False)[1][2]
+        return display_list
+        
+    def set_budget(self, budget_bytes):
+        """Change the memory limit, dropping least recently used lists if it shrank"""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            while self.total_bytes > self.budget_bytes and self.entries:
+                self.total_bytes -= self.entries.popitem(last=False)[1][2]
+                
+    def invalidate_file(self, filename):
+        """Forget the display lists of a file (closed, or rewritten on disk)"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == filename]:
+                self.total_bytes -= self.entries.pop(key)[2]
+                
+    def stats_text(self):
+        """One-line summary for the status bar"""
+        with self.lock:
+            return (f"display lists: {len(self.entries)} pages, ~{self.total_bytes / 1048576:.0f}/"
+                    f"{self.budget_bytes / 1048576:.0f} MB, {self.hits} hits")
+
+class PdfPageSource:
+    """Rasterize a PDF page with PyMuPDF at exactly the resolution the display needs"""
+    
+    progressive = False  # MuPDF already renders at final quality, and only on the UI thread
+    
+    def __init__(self, page_loader, render_scale=2.0, full_page_limit=16000000, cache=None, cache_key=None,
+                 engine=None, display_lists=None, color_mode='color'):
+        self.page_loader = page_loader  # Returns the fitz page (the document may be reopened after a save)
+        self.render_scale = render_scale  # Edit-buffer pixels per PDF point
+        self.full_page_limit = full_page_limit  # Above this many display pixels, render per-tile clips
+        self.cache = cache  # Optional PageRenderCache shared across pages
+        self.cache_key = cache_key  # (file, page, generation) identifying this page in the cache
+        self.engine = engine  # Optional RenderEngine; needs cache_key to know which page to render
+        self.display_lists = display_lists  # Optional DisplayListCache for in-process renders
+        page = page_loader()
+        self.page_rect = page.rect
+        self.width, self.height = page_pixel_size(page, render_scale)
+        self.gray = render_in_gray(page, color_mode)  # Scans render to 'L', a quarter of RGB's memory
+        self._page_render = None  # (zoom, image) of the whole page at the last zoom used
+        
+    def display_size(self, zoom):
+        """Return the pixel size of the whole page at a display zoom"""
+        return max(1, int(self.width * zoom)), max(1, int(self.height * zoom))
+        
+    def _render(self, zoom, size, box=None):
+        """Rasterize the whole page (or box of it) on the render engine's processes, or right here"""
+        if self.engine is not None and self.engine.uses_processes and self.cache_key is not None:
+            file_name, page_num, generation = self.cache_key
+            try:
+                return self.engine.render(file_name, page_num, generation, self.render_scale, zoom,
+                                          box=box, size=size, color_mode='gray' if self.gray else 'color')
+            except Exception as e:
+                print(f"DEBUG: Render engine failed, rendering in-process: {e}")
+        page = self.page_loader()
+        if self.display_lists is not None and self.cache_key is not None:
+            # Rendering from the recorded list skips re-interpreting the content stream
+            page = self.display_lists.get(self.cache_key, page)
+        if box is not None:
+            return render_page_box(page, self.render_scale, box, size, gray=self.gray)
+        scale = self.render_scale * zoom
+        return rasterize_page(page, fitz.Matrix(scale, scale), size, gray=self.gray)
+        
+    def _cached_render(self, zoom, size):
+        """Render the whole page at zoom, going through the shared page cache when there is one"""
+        key = None
+        if self.cache is not None and self.cache_key is not None:
+            file_name, page_num, generation = self.cache_key
+            key = (file_name, page_num, round(self.render_scale * zoom, 4), generation)
+            image = self.cache.get(key)
+            if image is not None:
+                return image
+                
+        image = self._render(zoom, size)
+        if key is not None:
+            self.cache.put(key, image)
+        return image
+        
+    def render_full(self):
+        """Render the whole page at edit-buffer resolution"""
+        image = self._cached_render(1.0, (self.width, self.height))
+        if self.gray and image.mode != 'L':
+            image = image.convert('L')  # Cached before the color mode changed
+        return image
+        
+    def render_page(self, zoom):
+        """Render the whole page at display resolution, reusing the last render at the same zoom"""
+        if self._page_render is not None and self._page_render[0] == zoom:
+            return self._page_render[1]
+            
+        image = self._cached_render(zoom, self.display_size(zoom))
+        self._page_render = (zoom, image)
+        return image
+        
+    def render_clip(self, box, size):
+        """Render only box (edit-buffer coordinates) of the page to an image of the given size"""
+        return self._render(None, size, box=box)
+        
+    def render_region(self, box, size, zoom, resample=None):
+        """Render box (edit-buffer coordinates) of the page at zoom into an image of the given size"""
+        if self.width * zoom * self.height * zoom <= self.full_page_limit:
+            # Small enough to rasterize the page once per zoom and cut tiles out of it
+            page_image = self.render_page(zoom)
+            x0 = round(box[0] * zoom)
+            y0 = round(box[1] * zoom)
+            return page_image.crop((x0, y0, x0 + size[0], y0 + size[1]))
+        return self.render_clip(box, size)
+
+class DocumentStripSource:
+    """Every page of a PDF stacked vertically as one tall source, for continuous scrolling"""
+    
+    progressive = False  # Pages come from PdfPageSource, already at final quality
+    
+    def __init__(self, document, page_source_factory, scale_for_page, gap=24, max_live_pages=6,
+                 background=(240, 240, 240)):
+        self.page_source_factory = page_source_factory  # page_num -> PdfPageSource
+        self.gap = gap  # Edit-buffer pixels between pages
+        self.max_live_pages = max_live_pages  # Page sources (and their renders) kept around
+        self.background = background  # Matches the canvas so the gaps look empty
+        
+        # Layout needs only the page sizes, nothing is rasterized here
+        # (scale_for_page must match the scale the factory's sources render at)
+        sizes = []
+        for page_num in range(len(document)):
+            page = document[page_num]
+            sizes.append(page_pixel_size(page, scale_for_page(page)))
+        self.width = max((w for w, _h in sizes), default=1)
+        self.page_boxes = []  # page_num -> (x0, y0, x1, y1) in strip coordinates, pages centred
+        y = 0
+        for w, h in sizes:
+            x = (self.width - w) // 2
+            self.page_boxes.append((x, y, x + w, y + h))
+            y += h + gap
+        self.height = max(1, y - gap)
+        self._page_tops = [box[1] for box in self.page_boxes]
+        self._live = OrderedDict()  # page_num -> PdfPageSource, least recently used first
+        self.modifications = None  # DocumentModifications of the document, drawn over its pages
+        
+    def page_at(self, y):
+        """Return the page under (or just above) strip coordinate y"""
+        return max(0, min(len(self.page_boxes) - 1, bisect.bisect_right(self._page_tops, y) - 1))
+        
+    def page_display_origin(self, page_num, zoom):
+        """Return the display-pixel position of a page's top-left corner"""
+        x0, y0, _x1, _y1 = self.page_boxes[page_num]
+        return round(x0 * zoom), round(y0 * zoom)
+        
+    def page_source(self, page_num):
+        """Return the source for one page, evicting the least recently used far-away pages"""
+        source = self._live.get(page_num)
+        if source is None:
+            source = self.page_source_factory(page_num)
+            self._live[page_num] = source
+            while len(self._live) > self.max_live_pages:
+                self._live.popitem(last=False)
+        else:
+            self._live.move_to_end(page_num)
+        return source
+        
+    def render_region(self, box, size, zoom, resample=None):
+        """Render box (strip coordinates) by compositing the parts of the pages it overlaps"""
+        tile = Image.new('RGB', size, self.background)
+        tile_x0, tile_y0 = round(box[0] * zoom), round(box[1] * zoom)
+        tile_x1, tile_y1 = tile_x0 + size[0], tile_y0 + size[1]
+        
+        page_num = self.page_at(box[1])
+        while page_num < len(self.page_boxes) and self.page_boxes[page_num][1] < box[3]:
+            px0, py0, px1, py1 = self.page_boxes[page_num]
+            # Work in whole display pixels so pages line up exactly across tile seams
+            page_x0, page_y0 = self.page_display_origin(page_num, zoom)
+            page_x1 = page_x0 + max(1, int((px1 - px0) * zoom))
+            page_y1 = page_y0 + max(1, int((py1 - py0) * zoom))
+            x0, y0 = max(tile_x0, page_x0), max(tile_y0, page_y0)
+            x1, y1 = min(tile_x1, page_x1), min(tile_y1, page_y1)
+            if x0 < x1 and y0 < y1:
+                source = self.page_source(page_num)
+                local_box = ((x0 - page_x0) / zoom, (y0 - page_y0) / zoom,
+                             min((x1 - page_x0) / zoom, source.width), min((y1 - page_y0) / zoom, source.height))
+                if resample is None:
+                    patch = source.render_region(local_box, (x1 - x0, y1 - y0), zoom)
+                else:
+                    patch = source.render_region(local_box, (x1 - x0, y1 - y0), zoom, resample)
+                annotations = self.modifications.pages.get(page_num) if self.modifications else None
+                if annotations:
+                    patch = draw_annotations(patch, annotations, local_box, zoom)
+                tile.paste(patch, (x0 - tile_x0, y0 - tile_y0))
+            page_num += 1
+        return tile
+
+class CanvasTile:
+    """One tile on the canvas: its item, the PhotoImage shown and the PIL pixels behind it"""
+    
+    __slots__ = ('item_id', 'photo', 'image', 'version', 'refined')
+    
+    def __init__(self, item_id, photo, image, refined):
+        self.item_id = item_id
+        self.photo = photo
+        self.image = image  # Kept so dirty rectangles can be patched without re-rendering the tile
+        self.version = 0  # Bumped when an edit repaints the tile, invalidating in-flight refinements
+        self.refined = refined
+
+class TiledCanvasRenderer:
+    """Draw a page on a canvas as fixed-size tiles, rendering only the visible ones"""
+    
+    # The source is anything with width, height and render_region(box, size, zoom):
+    # an ImagePyramid for images or a PdfPageSource for PDF pages (both wrapped in
+    # an AnnotatedSource), or a DocumentStripSource for a whole PDF in continuous-scroll mode
+    
+    def __init__(self, canvas, tile_size=512, keep_margin=2):
+        self.canvas = canvas
+        self.tile_size = tile_size  # Tile edge length in display pixels
+        self.keep_margin = keep_margin  # Tiles further than this (in tiles) from the viewport are dropped
+        self.source = None
+        self.zoom = 1.0
+        self.display_width = 0
+        self.display_height = 0
+        self.tiles = {}  # (col, row) -> CanvasTile
+        self.border_id = None
+        self._update_pending = None
+        
+        # Two-pass display: tiles are painted with a fast preview and a worker
+        # thread swaps in the LANCZOS version. Results are tagged with the frame
+        # generation so a newer zoom, page or edit discards stale refinements.
+        self.generation = 0
+        self._refine_jobs = queue.LifoQueue()  # Newest first: tiles just scrolled into view beat older ones
+        self._refined = queue.Queue()
+        self._refines_outstanding = 0
+        self._refine_poll = None
+        self._refine_thread = None
+        
+    def set_source(self, source, zoom):
+        """Show a page source at the given zoom, discarding every tile of the previous frame"""
+        self.clear()
+        
+        display_width = int(source.width * zoom)
+        display_height = int(source.height * zoom)
+        if display_width <= 0 or display_height <= 0:
+            return
+            
+        self.source = source
+        self.zoom = zoom
+        self.display_width = display_width
+        self.display_height = display_height
+        
+        # Add a subtle border around the document to show boundaries
+        self.border_id = self.canvas.create_rectangle(0, 0, display_width, display_height,
+                                                      outline="#cccccc", width=1, fill="")
+        
+        # The scroll region covers the whole page even though most tiles don't exist yet
+        self.canvas.configure(scrollregion=(0, 0, display_width, display_height))
+        self.update_visible()
+        
+    def clear(self):
+        """Remove all tiles from the canvas"""
+        self.generation += 1
+        if self._update_pending is not None:
+            self.canvas.after_cancel(self._update_pending)
+            self._update_pending = None
+        for tile in self.tiles.values():
+            self.canvas.delete(tile.item_id)
+        self.tiles = {}
+        if self.border_id is not None:
+            self.canvas.delete(self.border_id)
+            self.border_id = None
+        self.source = None
+        
+    def visible_tile_range(self, margin=0):
+        """Return the column and row ranges of tiles intersecting the viewport"""
+        ts = self.tile_size
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        
+        total_cols = (self.display_width + ts - 1) // ts
+        total_rows = (self.display_height + ts - 1) // ts
+        
+        first_col = max(0, int(left // ts) - margin)
+        last_col = min(total_cols - 1, int((left + width) // ts) + margin)
+        first_row = max(0, int(top // ts) - margin)
+        last_row = min(total_rows - 1, int((top + height) // ts) + margin)
+        return range(first_col, last_col + 1), range(first_row, last_row + 1)
+        
+    def schedule_update(self):
+        """Update visible tiles once the canvas is idle (coalesces bursts of scroll events)"""
+        if self.source is not None and self._update_pending is None:
+            self._update_pending = self.canvas.after_idle(self.update_visible)
+            
+    def update_visible(self, lead=(0, 0)):
+        """Create missing tiles inside the viewport and drop tiles far outside it"""
+        self._update_pending = None
+        if self.source is None:
+            return 0
+            
+        cols, rows = self.visible_tile_range()
+        created = 0
+        for row in rows:
+            for col in cols:
+                if (col, row) not in self.tiles:
+                    self._create_tile(col, row)
+                    created += 1
+                    
+        # While panning, also render the tiles about to scroll in (lead is the direction of motion)
+        if lead != (0, 0):
+            ahead_cols, ahead_rows = self._lead_tile_range(cols, rows, lead)
+            for row in ahead_rows:
+                for col in ahead_cols:
+                    if (col, row) not in self.tiles:
+                        self._create_tile(col, row)
+                        created += 1
+                    
+        # Bound memory on huge pages by forgetting tiles that scrolled well out of view
+        keep_cols, keep_rows = self.visible_tile_range(self.keep_margin)
+        stale = [key for key in self.tiles if key[0] not in keep_cols or key[1] not in keep_rows]
+        for key in stale:
+            self.canvas.delete(self.tiles.pop(key).item_id)
+        return created
+        
+    def _lead_tile_range(self, cols, rows, lead):
+        """Grow the visible tile ranges by one tile on the sides the view is moving towards"""
+        ts = self.tile_size
+        total_cols = (self.display_width + ts - 1) // ts
+        total_rows = (self.display_height + ts - 1) // ts
+        if lead[0] > 0:
+            cols = range(cols.start, min(total_cols, cols.stop + 1))
+        elif lead[0] < 0:
+            cols = range(max(0, cols.start - 1), cols.stop)
+        if lead[1] > 0:
+            rows = range(rows.start, min(total_rows, rows.stop + 1))
+        elif lead[1] < 0:
+            rows = range(max(0, rows.start - 1), rows.stop)
+        return cols, rows
+        
+    def tile_box(self, col, row):
+        """Return the display-space box (x0, y0, x1, y1) covered by a tile"""
+        ts = self.tile_size
+        x0 = col * ts
+        y0 = row * ts
+        return x0, y0, min(x0 + ts, self.display_width), min(y0 + ts, self.display_height)
+        
+    def tile_request(self, col, row):
+        """Return the source box and output size needed to render a tile"""
+        x0, y0, x1, y1 = self.tile_box(col, row)
+        box = (x0 / self.zoom, y0 / self.zoom,
+               min(x1 / self.zoom, self.source.width), min(y1 / self.zoom, self.source.height))
+        return box, (x1 - x0, y1 - y0)
+        
+    def render_tile(self, col, row):
+        """Render the part of the page covered by a tile at full quality"""
+        box, size = self.tile_request(col, row)
+        return self.source.render_region(box, size, self.zoom)
+        
+    def _create_tile(self, col, row):
+        """Render one tile and place it on the canvas"""
+        x0, y0, _x1, _y1 = self.tile_box(col, row)
+        progressive = self.source.progressive
+        if progressive:
+            box, size = self.tile_request(col, row)
+            tile_image = self.source.render_region(box, size, self.zoom, Image.Resampling.BILINEAR)
+        else:
+            tile_image = self.render_tile(col, row)
+            
+        photo = ImageTk.PhotoImage(tile_image)
+        item_id = self.canvas.create_image(x0, y0, anchor=tk.NW, image=photo, tags=("tile",))
+        # Keep tiles underneath the page border and any selection rectangles
+        self.canvas.tag_lower(item_id)
+        self.tiles[(col, row)] = CanvasTile(item_id, photo, tile_image, refined=not progressive)
+        if progressive:
+            self._queue_refine((col, row))
+            
+    def invalidate_region(self, box, margin=4):
+        """Repaint only the part of existing tiles under box (source coordinates) after an annotation changed"""
+        if self.source is None:
+            return 0
+            
+        # Grow the dirty rectangle a little to cover the resampling filter's footprint
+        zoom = self.zoom
+        dirty_x0 = max(0, int(box[0] * zoom) - margin)
+        dirty_y0 = max(0, int(box[1] * zoom) - margin)
+        dirty_x1 = min(self.display_width, int(math.ceil(box[2] * zoom)) + margin)
+        dirty_y1 = min(self.display_height, int(math.ceil(box[3] * zoom)) + margin)
+        
+        updated = 0
+        for key, tile in self.tiles.items():
+            tile_x0, tile_y0, tile_x1, tile_y1 = self.tile_box(*key)
+            x0, y0 = max(dirty_x0, tile_x0), max(dirty_y0, tile_y0)
+            x1, y1 = min(dirty_x1, tile_x1), min(dirty_y1, tile_y1)
+            if x0 >= x1 or y0 >= y1:
+                continue
+                
+            # Resample just the dirty part and patch it into the tile's pixels
+            source_box = (x0 / zoom, y0 / zoom,
+                          min(x1 / zoom, self.source.width), min(y1 / zoom, self.source.height))
+            patch = self.source.render_region(source_box, (x1 - x0, y1 - y0), zoom)
+            if tile.image.mode == 'L' and patch.mode != 'L':
+                # A coloured annotation on a gray page - the tile needs colour from now on
+                tile.image = tile.image.convert(patch.mode)
+                tile.image.paste(patch, (x0 - tile_x0, y0 - tile_y0))
+                tile.photo = ImageTk.PhotoImage(tile.image)
+                self.canvas.itemconfig(tile.item_id, image=tile.photo)
+            else:
+                tile.image.paste(patch, (x0 - tile_x0, y0 - tile_y0))
+                tile.photo.paste(tile.image)
+            
+            # A refinement started before the edit would paint the old pixels back
+            tile.version += 1
+            if not tile.refined:
+                self._queue_refine(key)
+            updated += 1
+        return updated
+        
+    def _queue_refine(self, key):
+        """Ask the worker thread for the high-quality version of a tile"""
+        if self._refine_thread is None:
+            self._refine_thread = threading.Thread(target=self._refine_worker, daemon=True)
+            self._refine_thread.start()
+        box, size = self.tile_request(*key)
+        version = self.tiles[key].version
+        self._refine_jobs.put((self.generation, key, version, self.source, box, size, self.zoom))
+        self._refines_outstanding += 1
+        if self._refine_poll is None:
+            self._refine_poll = self.canvas.after(15, self._poll_refined)
+            
+    def _refine_worker(self):
+        """Resample queued tiles with LANCZOS (runs on a background thread, never touches Tk)"""
+        while True:
+            generation, key, version, source, box, size, zoom = self._refine_jobs.get()
+            image = None
+            # Skip tiles that scrolled away (and were dropped) while the job waited
+            if generation == self.generation and key in self.tiles:
+                try:
+                    image = source.render_region(box, size, zoom)
+                except Exception as e:
+                    print(f"DEBUG: Tile refinement failed: {e}")
+            # Always report back so the UI thread knows when to stop polling
+            self._refined.put((generation, key, version, image))
+            
+    def _poll_refined(self):
+        """Swap refined tiles into the canvas (runs on the Tk thread via after)"""
+        self._refine_poll = None
+        while True:
+            try:
+                generation, key, version, image = self._refined.get_nowait()
+            except queue.Empty:
+                break
+            self._refines_outstanding -= 1
+            tile = self.tiles.get(key)
+            if image is None or generation != self.generation or tile is None or tile.version != version:
+                continue  # Stale frame, tile scrolled away or repainted by an edit
+            tile.photo = ImageTk.PhotoImage(image)
+            tile.image = image
+            tile.refined = True
+            self.canvas.itemconfig(tile.item_id, image=tile.photo)
+            
+        if self._refines_outstanding > 0:
+            self._refine_poll = self.canvas.after(15, self._poll_refined)
+
+_text_fonts = {}  # pixel size -> font, since annotations are drawn again for every tile and zoom
+
+def load_text_font(size):
+    """Return the font text annotations are drawn with at a pixel size"""
+    font = _text_fonts.get(size)
+    if font is None:
+        try:
+            # Try to load a system font
+            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", size)
+        except Exception:
+            try:
+                # Fallback to default font
+                font = ImageFont.load_default()
+            except Exception:
+                return None
+        _text_fonts[size] = font
+    return font
+
+class Annotation:
+    """One edit of a page (redaction, text run, highlight or signature), kept as shapes until the page is saved"""
+    
+    __slots__ = ('kind', 'params', 'pdf_modification', '_bounds', '_scaled_signature')
+    
+    def __init__(self, kind, **params):
+        self.kind = kind  # 'redaction', 'highlight', 'text' or 'signature'
+        self.params = params  # Edit-buffer coordinates, colours, text or the sized signature image
+        self.pdf_modification = None  # The same edit in PDF points ({'type', 'data'}), for PDFs
+        self._bounds = None
+        self._scaled_signature = None  # (size, image) of the signature at the last display scale
+        
+    def bounds(self):
+        """Return the box (x0, y0, x1, y1) the annotation covers, in edit-buffer coordinates"""
+        if self._bounds is None:
+            p = self.params
+            if self.kind in ('redaction', 'highlight'):
+                box = (p['x1'], p['y1'], p['x2'] + 1, p['y2'] + 1)  # Rectangles include x2, y2
+            elif self.kind == 'text':
+                box = ImageDraw.Draw(Image.new('1', (1, 1))).textbbox((p['x'], p['y']), p['text'],
+                                                                     font=load_text_font(p['size']))
+            else:
+                box = (p['x'], p['y'], p['x'] + p['image'].width, p['y'] + p['image'].height)
+            self._bounds = (int(math.floor(box[0])), int(math.floor(box[1])),
+                            int(math.ceil(box[2])), int(math.ceil(box[3])))
+        return self._bounds
+        
+    def move(self, dx, dy):
+        """Shift the annotation by (dx, dy) edit-buffer pixels"""
+        p = self.params
+        for x_key, y_key in (('x', 'y'), ('x1', 'y1'), ('x2', 'y2')):
+            if x_key in p:
+                p[x_key] += dx
+                p[y_key] += dy
+        self._bounds = None
+        
+    def resize(self, x2, y2):
+        """Move the bottom-right corner of a redaction or highlight to (x2, y2)"""
+        self.params['x2'] = x2
+        self.params['y2'] = y2
+        self._bounds = None
+        
+    def draw(self, image, scale=1.0, origin=(0, 0)):
+        """Draw the annotation onto image, which shows the page from origin (edit-buffer coordinates) at scale
+        
+        Draws in place where the mode allows and returns the resulting image.
+        """
+        p = self.params
+        ox, oy = origin
+        
+        def to_image(x, y):
+            return round((x - ox) * scale), round((y - oy) * scale)
+            
+        if self.kind in ('redaction', 'highlight'):
+            x0, y0 = to_image(p['x1'], p['y1'])
+            x1, y1 = to_image(p['x2'] + 1, p['y2'] + 1)
+            # At least a pixel wide when zoomed far out, then clipped to the image
+            x1, y1 = max(x1, x0 + 1), max(y1, y0 + 1)
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(image.width, x1), min(image.height, y1)
+            if x0 >= x1 or y0 >= y1:
+                return image
+            if self.kind == 'redaction':
+                if image.mode == 'L' and not is_gray_color(p['color']):
+                    image = image.convert('RGB')
+                ImageDraw.Draw(image).rectangle([x0, y0, x1 - 1, y1 - 1], fill=p['color'])
+            elif image.mode == 'L' and is_gray_color(p['color']):
+                # A gray highlight on a gray scan is a plain blend of the region - no colour needed
+                region = image.crop((x0, y0, x1, y1))
+                shade = Image.new('L', region.size, ImageColor.getcolor(p['color'], 'L'))
+                image.paste(Image.blend(region, shade, p['opacity']), (x0, y0))
+            else:
+                if image.mode == 'L':
+                    image = image.convert('RGB')
+                # Composite only the covered region, so the page stays RGB
+                r, g, b = ImageColor.getrgb(p['color'])[:3]
+                region = image.crop((x0, y0, x1, y1)).convert('RGBA')
+                overlay = Image.new('RGBA', region.size, (r, g, b, int(p['opacity'] * 255)))
+                image.paste(Image.alpha_composite(region, overlay).convert(image.mode), (x0, y0))
+        elif self.kind == 'text':
+            if image.mode == 'L' and not is_gray_color(p['color']):
+                image = image.convert('RGB')
+            font = load_text_font(max(1, round(p['size'] * scale)))
+            ImageDraw.Draw(image).text(to_image(p['x'], p['y']), p['text'], fill=p['color'], font=font)
+        else:
+            signature = p['image']
+            size = (max(1, round(signature.width * scale)), max(1, round(signature.height * scale)))
+            if size != signature.size:
+                # Resized once per zoom level, not once per tile
+                if self._scaled_signature is None or self._scaled_signature[0] != size:
+                    self._scaled_signature = (size, signature.resize(size, Image.Resampling.LANCZOS))
+                signature = self._scaled_signature[1]
+            if image.mode == 'L' and not image_is_grayscale(signature.convert('RGB')):
+                image = image.convert('RGB')
+            # Paste with the signature's alpha channel as the blending mask
+            image.paste(signature.convert(image.mode), to_image(p['x'], p['y']), signature.getchannel('A'))
+        return image
+
+class PageAnnotations:
+    """The annotations of one page in stacking order, with a uniform grid index for point and box queries"""
+    
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size  # Grid cell edge in edit-buffer pixels
+        self.items = []  # Bottom to top
+        self.cells = {}  # (col, row) -> set of annotations whose bounds touch that cell
+        self._boxes = {}  # annotation -> bounds it is filed under in cells
+        self._rank = {}  # annotation -> position in items
+        
+    def __len__(self):
+        return len(self.items)
+        
+    def __iter__(self):
+        return iter(self.items)
+        
+    def __getitem__(self, index):
+        return self.items[index]
+        
+    def index(self, annotation):
+        """Return an annotation's position in the stacking order"""
+        return self._rank[annotation]
+        
+    def _cells(self, box):
+        """Yield the grid cells a box touches"""
+        size = self.cell_size
+        for row in range(int(box[1] // size), int(box[3] // size) + 1):
+            for col in range(int(box[0] // size), int(box[2] // size) + 1):
+                yield col, row
+                
+    def _file(self, annotation):
+        box = annotation.bounds()
+        self._boxes[annotation] = box
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, set()).add(annotation)
+            
+    def _unfile(self, annotation):
+        for cell in self._cells(self._boxes.pop(annotation)):
+            bucket = self.cells[cell]
+            bucket.discard(annotation)
+            if not bucket:
+                del self.cells[cell]
+                
+    def _rerank(self, start):
+        # Updated in place from the first changed position - appends touch one entry
+        for position in range(start, len(self.items)):
+            self._rank[self.items[position]] = position
+            
+    def insert(self, index, annotation):
+        """Add an annotation at a position in the stacking order"""
+        self.items.insert(index, annotation)
+        self._file(annotation)
+        self._rerank(index)
+        
+    def append(self, annotation):
+        """Add an annotation on top of the others"""
+        self.insert(len(self.items), annotation)
+        
+    def remove(self, annotation):
+        """Take an annotation out; returns the position it had"""
+        index = self._rank.pop(annotation)
+        del self.items[index]
+        self._unfile(annotation)
+        self._rerank(index)
+        return index
+        
+    def reindex(self, annotation):
+        """File an annotation again after it was moved or resized"""
+        self._unfile(annotation)
+        self._file(annotation)
+        
+    def at(self, x, y):
+        """Return the topmost annotation containing a point, or None"""
+        best, best_rank = None, -1
+        for annotation in tuple(self.cells.get((int(x // self.cell_size), int(y // self.cell_size)), ())):
+            x0, y0, x1, y1 = annotation.bounds()
+            rank = self._rank.get(annotation, -1)
+            if x0 <= x < x1 and y0 <= y < y1 and rank > best_rank:
+                best, best_rank = annotation, rank
+        return best
+        
+    def overlapping(self, box):
+        """Return the annotations whose bounds intersect box, bottom to top"""
+        # Tiles are also drawn on the refinement thread while the UI thread edits,
+        # so buckets are copied and annotations removed meanwhile are skipped
+        found = set()
+        for cell in self._cells(box):
+            found.update(tuple(self.cells.get(cell, ())))
+        hits = []
+        for annotation in found:
+            rank = self._rank.get(annotation)
+            x0, y0, x1, y1 = annotation.bounds()
+            if rank is not None and x0 < box[2] and x1 > box[0] and y0 < box[3] and y1 > box[1]:
+                hits.append((rank, annotation))
+        hits.sort(key=lambda hit: hit[0])
+        return [annotation for _rank, annotation in hits]
+
+class DocumentModifications:
+    """Unsaved annotations of one file by page, with the pages changed since the last save"""
+    
+    def __init__(self):
+        self.pages = {}  # page_num -> PageAnnotations
+        self.dirty = set()  # Pages whose annotations changed since the file was loaded or saved
+        
+    def page(self, page_num):
+        """Return a page's annotations, creating them on first use"""
+        annotations = self.pages.get(page_num)
+        if annotations is None:
+            annotations = self.pages[page_num] = PageAnnotations()
+        return annotations
+        
+    def mark_dirty(self, page_num):
+        """Note that a page's annotations changed"""
+        self.dirty.add(page_num)
+        
+    def dirty_pages(self):
+        """Return the changed pages that still carry annotations, in page order"""
+        return sorted(page_num for page_num in self.dirty if self.pages.get(page_num))
+        
+    def pdf_modifications(self, page_num):
+        """Return a page's modifications in PDF points ({'type', 'data'} dicts), bottom to top"""
+        return [annotation.pdf_modification for annotation in self.pages.get(page_num, ())
+                if annotation.pdf_modification is not None]
+                
+    def clear(self):
+        """Forget every annotation (the file was saved, or loaded afresh)"""
+        # Fresh containers instead of emptying them: the refinement thread may be drawing from the old ones
+        self.pages = {}
+        self.dirty = set()
+
+def union_box(boxes):
+    """Return the box covering all of boxes, or None if there are none"""
+    boxes = list(boxes)
+    if not boxes:
+        return None
+    return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+def draw_annotations(image, annotations, box, scale):
+    """Composite a page's annotations overlapping box (edit-buffer coordinates) onto image, which shows box at scale"""
+    # Glyphs at a scaled font size can poke out of the unscaled text box by a pixel or two
+    pad = 2 / scale
+    for annotation in annotations.overlapping((box[0] - pad, box[1] - pad, box[2] + pad, box[3] + pad)):
+        image = annotation.draw(image, scale, box[:2])
+    return image
+
+def flatten_annotations(image, annotations):
+    """Return a copy of a page image at edit-buffer resolution with the annotations burnt in"""
+    image = image.copy()  # Page renders are shared with the caches
+    for annotation in annotations:
+        image = annotation.draw(image)
+    return image
+
+class AnnotatedSource:
+    """A page source with the page's annotations composited over every region it renders"""
+    
+    def __init__(self, base, modifications, page_num):
+        self.base = base  # ImagePyramid or PdfPageSource
+        self.modifications = modifications  # The file's DocumentModifications - changes show on the next repaint
+        self.page_num = page_num
+        self.width = base.width
+        self.height = base.height
+        self.progressive = base.progressive
+        
+    def render_region(self, box, size, zoom, resample=None):
+        """Render box of the page at zoom, then draw the annotations that overlap it"""
+        if resample is None:
+            image = self.base.render_region(box, size, zoom)
+        else:
+            image = self.base.render_region(box, size, zoom, resample)
+        annotations = self.modifications.pages.get(self.page_num)
+        if annotations:
+            image = draw_annotations(image, annotations, box, zoom)
+        return image
+
+class EditHistory:
+    """Undo/redo log of annotation changes: ('add' | 'delete', [(index, annotation)]), ('move', annotations, offset)
+    or ('resize', annotation, old corner, new corner)
+    """
+    
+    def __init__(self):
+        self.done = []  # Applied changes, oldest first
+        self.undone = []  # Changes that can be redone, most recently undone last
+        
+    def reset(self):
+        """Forget everything (another page was loaded)"""
+        self.done = []
+        self.undone = []
+        
+    def record(self, action):
+        """Add a new change; this ends the redo chain"""
+        self.done.append(action)
+        self.undone = []
+        
+    def pop_undo(self):
+        """Take the most recent change off the log, or return None"""
+        if not self.done:
+            return None
+        action = self.done.pop()
+        self.undone.append(action)
+        return action
+        
+    def pop_redo(self):
+        """Take the most recently undone change back, or return None"""
+        if not self.undone:
+            return None
+        action = self.undone.pop()
+        self.done.append(action)
+        return action
+
+class KineticPanner:
+    """Middle-drag panning that follows the pointer pixel for pixel and coasts on after a flick"""
+    
+    def __init__(self, canvas, on_move=None, frame_ms=16, friction=0.92, min_speed=0.05):
+        self.canvas = canvas
+        self.on_move = on_move  # Called with the (dx, dy) direction after the view moves
+        self.frame_ms = frame_ms
+        self.friction = friction  # Fraction of the speed kept each frame while coasting
+        self.min_speed = min_speed  # px/ms below which coasting stops
+        self.dragging = False
+        self.velocity = (0.0, 0.0)  # View motion in px/ms
+        self._last = None  # (x, y, time) of the previous drag event
+        self._carry = [0.0, 0.0]  # Sub-pixel motion not applied yet
+        self._coast_pending = None
+        
+    def press(self, x, y, time):
+        """Start a drag at widget point (x, y)"""
+        self.stop()
+        self.dragging = True
+        self.canvas.scan_mark(x, y)
+        self._last = (x, y, time)
+        
+    def drag(self, x, y, time):
+        """Move the view so the point under the pointer at press stays under it"""
+        if not self.dragging:
+            return
+        self.canvas.scan_dragto(x, y, gain=1)
+        last_x, last_y, last_time = self._last
+        dt = time - last_time
+        if dt > 0:
+            # Smooth the estimate; single events from high-rate mice are noisy
+            vx, vy = (last_x - x) / dt, (last_y - y) / dt
+            self.velocity = (0.7 * vx + 0.3 * self.velocity[0], 0.7 * vy + 0.3 * self.velocity[1])
+        self._last = (x, y, time)
+        if self.on_move is not None:
+            self.on_move(last_x - x, last_y - y)
+            
+    def release(self, time):
+        """End the drag, coasting on if the pointer was still moving"""
+        if not self.dragging:
+            return
+        self.dragging = False
+        if time - self._last[2] > 50:
+            return  # Pointer had come to rest before the button went up
+        if math.hypot(*self.velocity) >= self.min_speed:
+            self._coast_pending = self.canvas.after(self.frame_ms, self._coast)
+            
+    def _coast(self):
+        """Advance one frame of kinetic scrolling"""
+        self._coast_pending = None
+        dx, dy = self.velocity[0] * self.frame_ms, self.velocity[1] * self.frame_ms
+        if not self.scroll_by(dx, dy):
+            self.velocity = (0.0, 0.0)  # Hit the edge of the page
+            return
+        self.velocity = (self.velocity[0] * self.friction, self.velocity[1] * self.friction)
+        if math.hypot(*self.velocity) >= self.min_speed:
+            self._coast_pending = self.canvas.after(self.frame_ms, self._coast)
+            
+    def stop(self):
+        """Cancel any coasting"""
+        if self._coast_pending is not None:
+            self.canvas.after_cancel(self._coast_pending)
+            self._coast_pending = None
+        self.velocity = (0.0, 0.0)
+        self._carry = [0.0, 0.0]
+        
+    def scroll_by(self, dx, dy):
+        """Move the view by (dx, dy) canvas pixels; return whether it moved at all"""
+        region = self.canvas.cget("scrollregion").split()
+        if len(region) != 4:
+            return False
+        x0, y0, x1, y1 = (float(v) for v in region)
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        
+        # The canvas origin is whole pixels; keep the remainder for the next step
+        self._carry[0] += dx
+        self._carry[1] += dy
+        step_x, step_y = int(self._carry[0]), int(self._carry[1])
+        self._carry[0] -= step_x
+        self._carry[1] -= step_y
+        if step_x and x1 > x0:
+            self.canvas.xview_moveto((left + step_x - x0) / (x1 - x0))
+        if step_y and y1 > y0:
+            self.canvas.yview_moveto((top + step_y - y0) / (y1 - y0))
+            
+        moved = (self.canvas.canvasx(0), self.canvas.canvasy(0)) != (left, top)
+        if moved and self.on_move is not None:
+            self.on_move(step_x, step_y)
+        return moved or not (step_x or step_y)
+
+class RubberBand:
+    """Selection rectangle shown while dragging: one outline and label per gesture, moved at most once a frame"""
+    
+    def __init__(self, canvas, frame_ms=16):
+        self.canvas = canvas
+        self.frame_ms = frame_ms
+        self.start = None
+        self.rect = None
+        self.label = None
+        self.describe = None  # (x0, y0, x1, y1) -> label text, or None for no label
+        self._pointer = None  # Latest drag position not drawn yet
+        self._pending = None
+        
+    def active(self):
+        """Check whether a selection is being dragged"""
+        return self.rect is not None
+        
+    def begin(self, x, y, color, describe=None):
+        """Start a selection at canvas point (x, y)"""
+        self.cancel()
+        self.start = (x, y)
+        self.describe = describe
+        self.rect = self.canvas.create_rectangle(x, y, x, y, outline=color, width=2, dash=(5, 5),
+                                                 tags=("rubber_band",))
+        self.label = self.canvas.create_text(x, y, anchor=tk.SW, text="", fill="#333333",
+                                             font=("Arial", 9), tags=("rubber_band",))
+        
+    def update(self, x, y):
+        """Move the free corner to (x, y); redrawn on the next frame, however many motion events arrive"""
+        if self.rect is None:
+            return
+        self._pointer = (x, y)
+        if self._pending is None:
+            self._pending = self.canvas.after(self.frame_ms, self._redraw)
+            
+    def _redraw(self):
+        """Apply the latest drag position to the overlay items"""
+        self._pending = None
+        if self.rect is None or self._pointer is None:
+            return
+        x0, y0 = self.start
+        x1, y1 = self._pointer
+        self._pointer = None
+        self.canvas.coords(self.rect, x0, y0, x1, y1)
+        if self.describe is not None:
+            self.canvas.coords(self.label, min(x0, x1), min(y0, y1) - 3)
+            self.canvas.itemconfig(self.label, text=self.describe(x0, y0, x1, y1))
+            
+    def cancel(self):
+        """Remove the overlay without reporting a selection"""
+        if self._pending is not None:
+            self.canvas.after_cancel(self._pending)
+            self._pending = None
+        for item in (self.rect, self.label):
+            if item is not None:
+                self.canvas.delete(item)
+        self.rect = None
+        self.label = None
+        self.start = None
+        self._pointer = None
+
 class Redactor:
     def __init__(self, root):
         self.root = root
@@ -258,10 +2256,19 @@ class Redactor:
         
         # Application state
         self.current_file = None
-        self.current_image = None
-        self.original_image = None
-        self.display_image = None
-        self.canvas_image_id = None
+        self.current_image = None  # Full-resolution pixels of the page, never edited (rendered lazily for PDFs)
+        self.tile_renderer = None  # Created in setup_ui once the canvas exists
+        self.image_pyramid = None  # Zoom levels of current_image, rebuilt when the page changes
+        self.modifications = {}  # file -> DocumentModifications: annotations drawn over the pages until saved
+        self.selected_annotations = []  # Annotations picked with no tool active, to move or delete
+        self.selection_outlines = []  # Canvas items drawn around the selected annotations
+        self.annotation_drag = None  # (start canvas x, start canvas y, outline coords) while moving them
+        self.resize_handle = None  # Canvas item at the corner of a single selected box, dragged to resize it
+        self.annotation_resize = None  # Annotation whose corner is being dragged
+        self.marquee_start = None  # Canvas point a selection marquee was started from
+        self.pdf_page_source = None  # Renders the current PDF page at display resolution
+        self.document_strip = None  # All pages of the PDF stacked, used in continuous-scroll mode
+        self.document_strip_key = None  # (file, generation) the strip was laid out for
         self.is_pdf = False
         self.pdf_document = None
         self.current_page = 0
@@ -283,9 +2290,8 @@ class Redactor:
         # Context menu support
         self.current_context_menu = None
         
-        # Undo support
-        self.image_history = []  # Store previous states for undo
-        self.max_history = 10  # Maximum undo steps
+        # Undo support: annotations are added, moved and deleted through EditHistory
+        self.edit_history = EditHistory()
         
         # Directory memory
         self.last_directory = os.path.expanduser("~")  # Default to home directory
@@ -307,15 +2313,11 @@ class Redactor:
         self.redacting = False
         self.redaction_start_x = None
         self.redaction_start_y = None
-        self.redaction_rect = None
         
         # File modification tracking
         self.file_modified = False  # Track if current file has unsaved changes
         self.redaction_color = "#000000"  # Black by default
         
-        # PDF modification tracking - store actual PDF edits
-        self.pdf_modifications = {}  # Track modifications per PDF file per page
-        
         # Text mode state
         self.text_mode = False
         self.text_color = "#000000"  # Black by default
@@ -325,13 +2327,11 @@ class Redactor:
         self.ocr_mode = False
         self.ocr_start_x = None
         self.ocr_start_y = None
-        self.ocr_rect = None
         
         # Highlight mode state
         self.highlight_mode = False
         self.highlight_start_x = None
         self.highlight_start_y = None
-        self.highlight_rect = None
         self.highlight_color = "#FFFF00"  # Yellow by default
         self.highlight_opacity = 0.5  # 50% transparent
         
@@ -343,14 +2343,82 @@ class Redactor:
         
         # Per-file zoom tracking
         self.file_zoom_levels = {}  # Dictionary to store zoom level for each file
+        self.file_fit_modes = {}  # Files that follow the window size: 'width' or 'page'
+        self.fit_mode = None  # Auto-fit mode of the current file
+        self.auto_fit_pending = None
+        self.auto_fit_delay = 150  # ms after the last resize event before re-fitting
+        self.canvas_size = (0, 0)
+        
+        # Zoom and page/file navigation are coalesced: key-repeat bursts only render their final target
+        self.view_target = {}  # Pending 'zoom', 'page' and 'file_index' values not rendered yet
+        self.view_generation = 0  # Bumped on every input; an update scheduled for an older one is dropped
+        self.view_update_pending = None
+        self.view_update_delay = 60  # ms of quiet before the target is rendered
         
         # Load saved zoom settings
         self.load_zoom_settings()
         
+        # Rendering performance settings
+        self.page_cache_mb = 512  # Memory budget for rendered pages
+        self.prefetch_window = 2  # PDF pages rendered ahead of and behind the current one
+        self.file_prefetch_window = 1  # Files decoded ahead of and behind the current one
+        self.render_processes = None  # Rasterizer processes; None picks from the core count, 0 renders in-process
+        self.display_list_mb = 256  # Memory for parsed page display lists (per process)
+        self.render_megapixels = 40  # Largest edit buffer for a PDF page; bigger pages render below 2x
+        self.color_mode = 'auto'  # 'auto' keeps gray/bilevel scans in 'L' buffers, 'color' or 'gray' forces one
+        self.continuous_scroll = False  # Show all PDF pages in one vertical scroll instead of page by page
+        self.show_page_thumbnails = True  # Page thumbnail sidebar next to the canvas for PDFs
+        self.disk_cache_enabled = False  # Keep rendered PDF pages on disk between sessions
+        self.disk_cache_mb = 2048  # Size cap of the disk render cache
+        self.disk_cache_encrypted = False  # Also store pages of encrypted PDFs (decrypted!) on disk
+        self.thumbnail_cache_mb = 64  # Size cap of the on-disk thumbnail cache
+        self.load_performance_settings()
+        
+        # Rendered pages, keyed by (file, page, render scale, generation); a file's
+        # generation is bumped whenever it is rewritten on disk
+        self.page_cache = PageRenderCache(self.page_cache_mb * 1024 * 1024)
+        self.file_generations = {}
+        self.apply_disk_cache_settings()
+        
+        # PDF pages are rasterized on worker processes shared by the viewer, prefetchers and exports
+        self.render_engine = RenderEngine(self.render_processes,
+                                          get_password=lambda f: self.pdf_passwords.get(os.path.abspath(f)),
+                                          display_list_budget=self.display_list_mb * 1024 * 1024)
+        
+        # Parsed pages of the open PDF, reused when the viewer renders them again at another zoom or clip
+        self.display_lists = DisplayListCache(self.display_list_mb * 1024 * 1024)
+        self.render_engine.start()
+        
+        # Neighbouring PDF pages are rendered in the background while the user reads
+        self.page_prefetcher = PagePrefetcher(self.page_cache, self.render_engine, window=self.prefetch_window)
+        
+        # Neighbouring files in the list are decoded ahead so next/previous is instant
+        self.file_prefetcher = FilePrefetcher(self.page_cache, self.render_engine,
+                                              self.page_cache_mb * 1024 * 1024 // 4)
+        
+        # Page and file thumbnails, generated in the background and cached on disk
+        self.thumbnail_cache = ThumbnailCache(self.render_engine,
+                                              os.path.expanduser("~/.config/redactor/thumbnails"),
+                                              disk_budget_bytes=self.thumbnail_cache_mb * 1024 * 1024)
+        self.thumbnail_items = {}  # page_num -> (frame, image, label) canvas items in the sidebar
+        self.thumbnail_photos = {}  # page_num -> PhotoImage shown in the sidebar
+        self.thumbnail_update_pending = None
+        self.thumbnail_poll = None
+        self.file_preview_name = None  # File whose thumbnail the file panel preview shows
+        self.file_preview_photo = None
+        
         # Setup UI
         self.setup_ui()
         self.setup_bindings()
         
+        # Redaction, OCR and highlight selections share one drag overlay
+        self.rubber_band = RubberBand(self.canvas)
+        
+        # Panning moves the view in whole pixels and renders tiles ahead of the motion
+        self.pan_step = 48  # Pixels per arrow-key press
+        self.panner = KineticPanner(self.canvas,
+                                    on_move=lambda dx, dy: self.tile_renderer.update_visible(lead=(dx, dy)))
+        
         # Setup window close handler to save zoom settings
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -391,9 +2459,44 @@ class Redactor:
         view_menu.add_command(label="Reset Zoom (Ctrl+0)", command=self.reset_zoom)
         view_menu.add_command(label="100% Zoom (0)", command=self.reset_zoom_100)
         view_menu.add_command(label="Fit to Window", command=self.fit_to_window)
+        self.fit_mode_var = tk.StringVar(value="")
+        view_menu.add_radiobutton(label="Auto-Fit Off", variable=self.fit_mode_var, value="",
+                                  command=self.on_fit_mode_menu)
+        view_menu.add_radiobutton(label="Auto-Fit Width", variable=self.fit_mode_var, value="width",
+                                  command=self.on_fit_mode_menu)
+        view_menu.add_radiobutton(label="Auto-Fit Page", variable=self.fit_mode_var, value="page",
+                                  command=self.on_fit_mode_menu)
+        view_menu.add_separator()
+        self.continuous_scroll_var = tk.BooleanVar(value=self.continuous_scroll)
+        view_menu.add_checkbutton(label="Continuous Scroll (PDF)", variable=self.continuous_scroll_var,
+                                  command=self.toggle_continuous_scroll)
+        self.page_thumbnails_var = tk.BooleanVar(value=self.show_page_thumbnails)
+        view_menu.add_checkbutton(label="Page Thumbnails (PDF)", variable=self.page_thumbnails_var,
+                                  command=self.toggle_page_thumbnails)
         view_menu.add_separator()
         view_menu.add_command(label="Save Default Zoom (S)", command=self.save_default_zoom)
         view_menu.add_command(label="Restore Default Zoom (9)", command=self.load_default_zoom)
+        view_menu.add_separator()
+        view_menu.add_command(label="Render Cache Statistics", command=self.show_render_cache_stats)
+        view_menu.add_command(label="Set Render Cache Size...", command=self.set_render_cache_size)
+        view_menu.add_command(label="Set Page Pixel Budget...", command=self.set_render_pixel_budget)
+        self.color_mode_var = tk.StringVar(value=self.color_mode)
+        color_menu = tk.Menu(view_menu, tearoff=0)
+        view_menu.add_cascade(label="Page Color Mode", menu=color_menu)
+        color_menu.add_radiobutton(label="Auto-Detect Gray Scans", variable=self.color_mode_var, value="auto",
+                                   command=self.on_color_mode_menu)
+        color_menu.add_radiobutton(label="Always Color", variable=self.color_mode_var, value="color",
+                                   command=self.on_color_mode_menu)
+        color_menu.add_radiobutton(label="Treat as Grayscale", variable=self.color_mode_var, value="gray",
+                                   command=self.on_color_mode_menu)
+        self.disk_cache_var = tk.BooleanVar(value=self.disk_cache_enabled)
+        view_menu.add_checkbutton(label="Disk Render Cache", variable=self.disk_cache_var,
+                                  command=self.toggle_disk_cache)
+        self.disk_cache_encrypted_var = tk.BooleanVar(value=self.disk_cache_encrypted)
+        view_menu.add_checkbutton(label="Disk Cache Encrypted PDFs", variable=self.disk_cache_encrypted_var,
+                                  command=self.toggle_disk_cache_encrypted)
+        view_menu.add_command(label="Set Disk Cache Size...", command=self.set_disk_cache_size)
+        view_menu.add_command(label="Clear Disk Cache", command=self.clear_disk_cache)
         
         # Tools menu
         tools_menu = tk.Menu(menubar, tearoff=0)
@@ -427,9 +2530,12 @@ class Redactor:
         
         tk.Button(file_frame, text="Write", command=self.save_file_overwrite, bg="#ffcccc").pack(side=tk.LEFT, padx=2)
         
-        # Undo button
+        # Undo/redo buttons
         self.undo_button = tk.Button(file_frame, text="↶ Undo", command=self.undo_action, bg="#ffe6e6")
         self.undo_button.pack(side=tk.LEFT, padx=2)
+        self.redo_button = tk.Button(file_frame, text="↷ Redo", command=self.redo_action, bg="#ffe6e6",
+                                     state='disabled')
+        self.redo_button.pack(side=tk.LEFT, padx=2)
         
         # Mode buttons on first toolbar
         tools_frame = tk.Frame(toolbar1)
@@ -567,9 +2673,17 @@ class Redactor:
                                       selectmode=tk.SINGLE, font=("Arial", 9))
         self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.file_listbox.bind('<<ListboxSelect>>', self.on_file_select)
+        self.file_listbox.bind('<Motion>', self.on_file_list_hover)
+        self.file_listbox.bind('<Leave>', lambda e: self.show_file_preview(self.current_file))
         
         file_scrollbar.config(command=self.file_listbox.yview)
         
+        # Thumbnail of the file under the mouse (or the current file)
+        # (a blank image keeps the label one thumbnail tall while nothing is shown)
+        self.file_preview_blank = tk.PhotoImage(width=1, height=self.thumbnail_cache.size[1])
+        self.file_preview_label = tk.Label(file_panel, image=self.file_preview_blank, bg="#e0e0e0")
+        self.file_preview_label.pack(fill=tk.X, padx=5)
+        
         # File list buttons
         list_buttons = tk.Frame(file_panel)
         list_buttons.pack(fill=tk.X, padx=5, pady=5)
@@ -584,21 +2698,41 @@ class Redactor:
         main_paned.add(canvas_frame, minsize=400)
         
         # Create scrollbars for canvas
-        h_scrollbar = tk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.h_scrollbar = tk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL)
+        self.h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        v_scrollbar = tk.Scrollbar(canvas_frame, orient=tk.VERTICAL)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.v_scrollbar = tk.Scrollbar(canvas_frame, orient=tk.VERTICAL)
+        self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Canvas with drag & drop support - light gray background to show white document boundaries
         self.canvas = tk.Canvas(canvas_frame, bg="#f0f0f0", 
-                              xscrollcommand=h_scrollbar.set, 
-                              yscrollcommand=v_scrollbar.set)
+                              xscrollcommand=self.on_canvas_xscroll, 
+                              yscrollcommand=self.on_canvas_yscroll)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Configure scrollbars
-        h_scrollbar.config(command=self.canvas.xview)
-        v_scrollbar.config(command=self.canvas.yview)
+        self.h_scrollbar.config(command=self.canvas.xview)
+        self.v_scrollbar.config(command=self.canvas.yview)
+        
+        # Page tiles are created lazily as the visible part of the canvas changes
+        self.tile_renderer = TiledCanvasRenderer(self.canvas)
+        
+        # Page thumbnail sidebar, only added to the paned window while a PDF is open
+        self.main_paned = main_paned
+        self.thumbnail_panel = tk.Frame(main_paned)
+        thumbnail_scrollbar = tk.Scrollbar(self.thumbnail_panel, orient=tk.VERTICAL)
+        thumbnail_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.thumbnail_canvas = tk.Canvas(self.thumbnail_panel, width=self.thumbnail_cache.size[0] + 24,
+                                          bg="#e0e0e0", yscrollcommand=self.on_thumbnail_scroll)
+        self.thumbnail_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        thumbnail_scrollbar.config(command=self.thumbnail_canvas.yview)
+        self.thumbnail_scrollbar = thumbnail_scrollbar
+        self.thumbnail_canvas.bind('<Button-1>', self.on_thumbnail_click)
+        self.thumbnail_canvas.bind('<Configure>', lambda e: self.schedule_thumbnail_update())
+        self.thumbnail_canvas.bind('<MouseWheel>',
+                                   lambda e: self.thumbnail_canvas.yview_scroll(int(-e.delta / 120), "units"))
+        self.thumbnail_canvas.bind('<Button-4>', lambda e: self.thumbnail_canvas.yview_scroll(-1, "units"))
+        self.thumbnail_canvas.bind('<Button-5>', lambda e: self.thumbnail_canvas.yview_scroll(1, "units"))
         
         # Setup drag & drop
         self.canvas.drop_target_register(DND_FILES)
@@ -620,6 +2754,7 @@ class Redactor:
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
         self.canvas.bind("<Button-3>", self.on_right_click)  # Right-click for context menu
+        self.canvas.bind("<Configure>", self.on_canvas_configure)  # Canvas resized
         
         # Middle mouse button scrolling
         self.canvas.bind("<Button-2>", self.on_middle_click)  # Middle mouse press
@@ -642,6 +2777,7 @@ class Redactor:
         self.root.bind("i", lambda e: self.toggle_signature_mode())  # 'i' for initials/signature
         self.root.bind("o", lambda e: self.toggle_ocr_mode())  # 'o' for OCR text extraction
         self.root.bind("<Control-z>", lambda e: self.undo_action())  # Ctrl+Z for undo
+        self.root.bind("<Control-Shift-Z>", lambda e: self.redo_action())  # Ctrl+Shift+Z for redo (Ctrl+Y is Save As)
         self.root.bind("<Control-m>", lambda e: self.manage_signatures())  # Ctrl+M for manage signatures
         self.root.bind("<Prior>", lambda e: self.prev_page())  # Page Up
         self.root.bind("<Next>", lambda e: self.next_page())   # Page Down
@@ -651,7 +2787,7 @@ class Redactor:
         self.root.bind("<Control-Right>", lambda e: self.next_file())
         self.root.bind("<Control-Home>", lambda e: self.first_file())
         self.root.bind("<Control-End>", lambda e: self.last_file())
-        self.root.bind("<Delete>", lambda e: self.remove_selected_file())
+        self.root.bind("<Delete>", lambda e: self.on_delete_key())  # Selected annotation, else selected file
         
         # Zoom bindings
         self.root.bind("<Control-plus>", lambda e: self.zoom_in())
@@ -756,6 +2892,9 @@ class Redactor:
             if self.current_file_index == -1:
                 self.current_file_index = 0
                 self.load_current_file()
+            else:
+                # The current file may have gained a neighbour
+                self.schedule_file_prefetch()
             self.update_file_info()
             self.status_var.set(f"Added {added_count} file(s). Total: {len(self.file_list)}")
         else:
@@ -788,12 +2927,15 @@ class Redactor:
             
     def clear_file_list(self):
         """Clear the file list"""
+        self.file_prefetcher.cancel()
+        self.page_prefetcher.cancel()
         self.file_list.clear()
         self.file_listbox.delete(0, tk.END)
         self.current_file_index = -1
         self.current_file = None
         self.current_image = None
-        self.canvas.delete("all")
+        self.pdf_page_source = None
+        self.clear_canvas()
         self.update_file_info()
         self.status_var.set("File list cleared")
         
@@ -846,6 +2988,8 @@ class Redactor:
             index = selection[0]
             removed_file = self.file_list.pop(index)
             self.file_listbox.delete(index)
+            # Queued neighbours were picked by position, which just shifted
+            self.file_prefetcher.cancel()
             
             # Adjust current file index
             if index == self.current_file_index:
@@ -857,9 +3001,12 @@ class Redactor:
                     self.current_file_index = -1
                     self.current_file = None
                     self.current_image = None
-                    self.canvas.delete("all")
-            elif index < self.current_file_index:
-                self.current_file_index -= 1
+                    self.pdf_page_source = None
+                    self.clear_canvas()
+            else:
+                if index < self.current_file_index:
+                    self.current_file_index -= 1
+                self.schedule_file_prefetch()
                 
             self.update_file_info()
             self.status_var.set(f"Removed: {os.path.basename(removed_file)}")
@@ -872,9 +3019,11 @@ class Redactor:
                 return  # User canceled the operation
             
             # Clear the current file display
+            self.page_prefetcher.cancel()
             self.current_file = None
             self.current_image = None
-            self.canvas.delete("all")
+            self.pdf_page_source = None
+            self.clear_canvas()
             
             # Clear selection in listbox
             self.file_listbox.selection_clear(0, 'end')
@@ -928,6 +3077,7 @@ class Redactor:
                         pass
                 
                 # Remove from file list
+                self.file_prefetcher.cancel()
                 if self.current_file in self.file_list:
                     file_index = self.file_list.index(self.current_file)
                     self.file_list.pop(file_index)
@@ -935,11 +3085,13 @@ class Redactor:
                 
                 # Actually delete the file from disk
                 os.remove(file_path)
+                self.mark_file_changed_on_disk(file_path)
                 
                 # Clear current file state
                 self.current_file = None
                 self.current_image = None
-                self.canvas.delete("all")
+                self.pdf_page_source = None
+                self.clear_canvas()
                 self.current_file_index = -1
                 self.is_pdf = False
                 self.pdf_page = None
@@ -976,6 +3128,7 @@ class Redactor:
             
     def load_current_file(self):
         """Load the currently selected file"""
+        self.discard_view_update()
         if 0 <= self.current_file_index < len(self.file_list):
             filename = self.file_list[self.current_file_index]
             try:
@@ -985,6 +3138,7 @@ class Redactor:
                     
                     # If we're switching away from a PDF, close it properly
                     if self.is_pdf and self.pdf_document:
+                        self.display_lists.invalidate_file(self.current_file)
                         try:
                             self.pdf_document.close()
                         except:
@@ -1005,7 +3159,11 @@ class Redactor:
                     self.zoom_factor = self.file_zoom_levels[filename]
                 else:
                     self.zoom_factor = self.default_zoom
+                self.fit_mode = self.file_fit_modes.get(filename)
+                self.fit_mode_var.set(self.fit_mode or "")
                 
+                # Clear any existing modifications for this file (fresh start)
+                self.get_document_modifications(filename).clear()
                 if file_ext == '.pdf':
                     success = self.load_pdf(filename)
                     if not success:
@@ -1014,24 +3172,42 @@ class Redactor:
                 else:
                     self.load_image(filename)
                     
+                # The stored zoom was fitted to the window at the time; only re-renders if it changed size
+                self.apply_auto_fit()
                 self.update_file_info()
                 self.status_var.set(f"Loaded: {os.path.basename(filename)} (zoom: {self.zoom_factor:.1f}x)")
                 
                 # Reset modification flag for newly loaded file
                 self.file_modified = False
                 
-                # Clear any existing PDF modifications for this file (fresh start)
-                if filename in [key.split(':')[0] for key in self.pdf_modifications.keys()]:
-                    old_keys = [key for key in self.pdf_modifications.keys() if key.startswith(f"{filename}:")]
-                    for key in old_keys:
-                        del self.pdf_modifications[key]
-                
                 # Add to recent files
                 self.add_recent_file(filename)
                 
+                # Decode the neighbours while the user reviews this file
+                self.schedule_file_prefetch()
+                self.show_file_preview(filename)
+                
             except Exception as e:
                 messagebox.showerror("Error", f"Could not open file: {str(e)}")
                 
+    def schedule_file_prefetch(self):
+        """Queue background decodes of the files around the current one, nearest (and forward) first"""
+        jobs = []
+        for distance in range(1, self.file_prefetch_window + 1):
+            for index in (self.current_file_index + distance, self.current_file_index - distance):
+                if not 0 <= index < len(self.file_list):
+                    continue
+                filename = self.file_list[index]
+                generation = self.get_file_generation(filename)
+                if os.path.splitext(filename)[1].lower() == '.pdf':
+                    zoom = self.file_zoom_levels.get(filename, self.default_zoom)
+                    # The worker works out the key once it knows the page's render scale
+                    jobs.append(('pdf', filename, None,
+                                 (zoom, self.render_megapixels * 1e6, generation, self.color_mode)))
+                else:
+                    jobs.append(('image', filename, (filename, 0, 1.0, generation), self.color_mode))
+        self.file_prefetcher.schedule(jobs)
+        
     def first_file(self):
         """Go to first file"""
         if self.file_list:
@@ -1046,15 +3222,80 @@ class Redactor:
             
     def next_file(self):
         """Go to next file"""
-        if self.file_list and self.current_file_index < len(self.file_list) - 1:
-            self.current_file_index += 1
-            self.load_current_file()
+        index = self.view_target.get('file_index', self.current_file_index)
+        if self.file_list and index < len(self.file_list) - 1:
+            self.request_file_switch(index + 1)
             
     def prev_file(self):
         """Go to previous file"""
-        if self.file_list and self.current_file_index > 0:
-            self.current_file_index -= 1
-            self.load_current_file()
+        index = self.view_target.get('file_index', self.current_file_index)
+        if self.file_list and index > 0:
+            self.request_file_switch(index - 1)
+            
+    def request_file_switch(self, index):
+        """Queue a switch to another file, showing only where the burst ends up"""
+        # Zoom/page input for the file being left doesn't need rendering any more
+        zoom = self.view_target.pop('zoom', None)
+        if zoom is not None:
+            self.zoom_factor = zoom  # Remembered for this file by load_current_file
+        self.view_target.pop('page', None)
+        self.request_view_update(file_index=index)
+        
+        # Cheap feedback now, the file itself loads once the input settles
+        self.file_listbox.selection_clear(0, tk.END)
+        self.file_listbox.selection_set(index)
+        self.file_listbox.see(index)
+        self.file_info_label.config(text=f"{index + 1} of {len(self.file_list)}")
+        self.status_var.set(f"Opening: {os.path.basename(self.file_list[index])}")
+        
+    def request_view_update(self, **target):
+        """Record a new view target and (re)start the debounce before rendering it"""
+        self.view_target.update(target)
+        self.view_generation += 1
+        if self.view_update_pending is not None:
+            self.root.after_cancel(self.view_update_pending)
+        self.view_update_pending = self.root.after(self.view_update_delay, self.apply_view_update,
+                                                   self.view_generation)
+        
+    def discard_view_update(self, *keys):
+        """Drop pending targets (all of them if no keys) that a direct render has superseded"""
+        for key in keys or list(self.view_target):
+            self.view_target.pop(key, None)
+        if not self.view_target and self.view_update_pending is not None:
+            self.root.after_cancel(self.view_update_pending)
+            self.view_update_pending = None
+            
+    def apply_view_update(self, generation=None):
+        """Render the coalesced view target (generation is None to flush it right away)"""
+        if generation is not None and generation != self.view_generation:
+            return  # More input arrived after this update was scheduled
+        if self.view_update_pending is not None:
+            self.root.after_cancel(self.view_update_pending)
+            self.view_update_pending = None
+        target, self.view_target = self.view_target, {}
+        
+        if 'file_index' in target:
+            if 0 <= target['file_index'] < len(self.file_list):
+                self.current_file_index = target['file_index']
+                self.load_current_file()
+            return
+            
+        zoom = target.get('zoom')
+        if zoom is not None:
+            self.zoom_factor = zoom
+            # Save zoom level for current file
+            if self.current_file:
+                self.file_zoom_levels[self.current_file] = self.zoom_factor
+                self.save_zoom_settings()  # Save to persistent storage
+                
+        page = target.get('page')
+        if (page is not None and page != self.current_page and self.is_pdf
+                and self.ensure_pdf_document_open() and 0 <= page < self.total_pages):
+            self.current_page = page
+            self.load_pdf_page()  # Also picks up the new zoom
+        elif zoom is not None:
+            self.display_image_on_canvas()
+            self.status_var.set(f"Zoom: {self.zoom_factor:.1f}x")
             
     def update_file_info(self):
         """Update file info display"""
@@ -1066,16 +3307,23 @@ class Redactor:
             
     def load_image(self, filename):
         """Load an image file"""
+        self.page_prefetcher.cancel()
         self.is_pdf = False
         self.pdf_document = None
+        self.pdf_page_source = None
         self.pdf_frame.pack_forget()  # Hide PDF controls
+        self.reset_page_thumbnails()
         
-        # Load image
-        self.original_image = Image.open(filename)
-        if self.original_image.mode != 'RGB':
-            self.original_image = self.original_image.convert('RGB')
+        # Load image (decoded images are kept in the page cache for quick revisits)
+        cache_key = (filename, 0, 1.0, self.get_file_generation(filename))
+        self.file_prefetcher.wait_for(cache_key)
+        self.current_image = self.page_cache.get(cache_key)
+        if self.current_image is None:
+            self.current_image = decode_image_file(filename, self.color_mode)
+            self.page_cache.put(cache_key, self.current_image)
             
-        self.current_image = self.original_image.copy()
+        # Edits are annotations drawn over the image; its pixels are shared with the cache as they are
+        self.reset_edit_history()
         
         # Display with current zoom level (set by load_current_file)
         self.display_image_on_canvas()
@@ -1113,6 +3361,7 @@ class Redactor:
             self.pdf_frame.pack(side=tk.LEFT, padx=2)
             self.page_label.config(text=f"of {self.total_pages}")
             self.page_var.set("1")
+            self.reset_page_thumbnails()
             
             self.load_pdf_page()
             return True
@@ -1141,30 +3390,42 @@ class Redactor:
                 self.pdf_document = None
                 return False
         return True
-
-    def load_pdf_page(self):
-        """Load current page from PDF"""
+        
+    def load_pdf_page(self, reveal=True):
+        """Load current page from PDF (reveal scrolls to it in continuous-scroll mode)"""
         if not self.ensure_pdf_document_open():
             print("DEBUG: Cannot ensure PDF document is open")
             return
             
+        self.discard_view_update('page')
         try:
-            page = self.pdf_document[self.current_page]
-            # Render page to image at high resolution
-            mat = fitz.Matrix(2.0, 2.0)  # 2x scale for better quality
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("ppm")
-            
-            # Convert to PIL Image
-            from io import BytesIO
-            self.original_image = Image.open(BytesIO(img_data))
-            if self.original_image.mode != 'RGB':
-                self.original_image = self.original_image.convert('RGB')
+            # Don't rasterize the full 2x edit buffer up front - the display asks
+            # MuPDF for exactly the zoom it needs and ensure_edit_buffer renders
+            # the full-resolution page only when it is saved as an image
+            page_num = self.current_page
+            if self.continuous_scroll:
+                # Share the strip's source so the page isn't rendered twice
+                self.pdf_page_source = self.get_document_strip().page_source(page_num)
+            else:
+                self.pdf_page_source = self.create_pdf_page_source(page_num)
                 
-            self.current_image = self.original_image.copy()
+            # A prefetcher may be rendering this very page right now
+            generation = self.get_file_generation(self.current_file)
+            scale = self.pdf_page_source.render_scale * self.zoom_factor
+            display_key = (self.current_file, page_num, round(scale, 4), generation)
+            self.file_prefetcher.wait_for(display_key)
+            self.page_prefetcher.wait_for(display_key)
+            self.current_image = None
+            self.reset_edit_history()
             
             # Display with current zoom level (preserved per-file)
             self.display_image_on_canvas()
+            if self.continuous_scroll and reveal:
+                self.scroll_to_page(page_num)
+            self.highlight_page_thumbnail()
+            
+            # Render the neighbours while the user looks at this page
+            self.schedule_page_prefetch()
             
             # Store the current file's zoom level for PDF pages too
             if self.current_file:
@@ -1175,38 +3436,361 @@ class Redactor:
         except Exception as e:
             messagebox.showerror("Error", f"Could not load PDF page: {str(e)}")
             
-    def get_pdf_page_key(self):
-        """Get a unique key for the current PDF page"""
-        if self.is_pdf and self.current_file:
-            return f"{self.current_file}:{self.current_page}"
-        return None
-        
-    def add_pdf_modification(self, mod_type, **kwargs):
-        """Add a modification to be applied to the PDF"""
-        page_key = self.get_pdf_page_key()
-        if not page_key:
+    def page_render_scale(self, page_num):
+        """Return the edit-buffer scale of a page of the open PDF under the pixel budget"""
+        return adaptive_render_scale(self.get_pdf_page(page_num).rect, self.render_megapixels * 1e6)
+        
+    def get_page_transform(self):
+        """Return the pixel/PDF-point mapping of the current page (identity for images)"""
+        if self.is_pdf and self.pdf_page_source is not None:
+            return PageTransform(self.pdf_page_source.render_scale,
+                                 (self.pdf_page_source.page_rect.x0, self.pdf_page_source.page_rect.y0))
+        return PageTransform(1.0)
+        
+    def create_pdf_page_source(self, page_num):
+        """Create the display source for one page of the open PDF"""
+        cache_key = (self.current_file, page_num, self.get_file_generation(self.current_file))
+        return PdfPageSource(lambda: self.get_pdf_page(page_num), render_scale=self.page_render_scale(page_num),
+                             cache=self.page_cache, cache_key=cache_key, engine=self.render_engine,
+                             display_lists=self.display_lists, color_mode=self.color_mode)
+        
+    def get_document_strip(self):
+        """Return the continuous-scroll layout of the open PDF, laying it out again after a save"""
+        key = (self.current_file, self.get_file_generation(self.current_file))
+        if self.document_strip is None or self.document_strip_key != key:
+            self.ensure_pdf_document_open()
+            budget = self.render_megapixels * 1e6
+            self.document_strip = DocumentStripSource(self.pdf_document, self.create_pdf_page_source,
+                                                      lambda page: adaptive_render_scale(page.rect, budget))
+            self.document_strip_key = key
+        return self.document_strip
+        
+    def is_continuous_view(self):
+        """Check whether the canvas currently shows a whole PDF in continuous-scroll mode"""
+        return (self.continuous_scroll and self.is_pdf and self.document_strip is not None
+                and self.tile_renderer.source is self.document_strip)
+        
+    def toggle_continuous_scroll(self):
+        """Switch between page-by-page and continuous-scroll display of PDFs"""
+        self.continuous_scroll = self.continuous_scroll_var.get()
+        self.save_performance_settings()
+        if self.is_pdf and self.has_page():
+            self.display_image_on_canvas()
+            if self.continuous_scroll:
+                self.scroll_to_page(self.current_page)
+        mode = "continuous scroll" if self.continuous_scroll else "single page"
+        self.status_var.set(f"PDF view: {mode}")
+        
+    def scroll_to_page(self, page_num):
+        """Scroll the continuous view so a page's top edge is at the top of the window"""
+        if not self.is_continuous_view():
+            return
+        _x, y = self.document_strip.page_display_origin(page_num, self.zoom_factor)
+        self.canvas.yview_moveto(y / max(1, self.tile_renderer.display_height))
+        
+    def canvas_to_page(self, canvas_x, canvas_y):
+        """Convert canvas coordinates to coordinates on the current page's own (zoomed) canvas"""
+        if not self.is_continuous_view():
+            return canvas_x, canvas_y
+        x, y = self.document_strip.page_display_origin(self.current_page, self.zoom_factor)
+        return canvas_x - x, canvas_y - y
+        
+    def focus_page_at(self, canvas_x, canvas_y):
+        """In continuous-scroll mode, make the page under a canvas point the one being edited"""
+        if not self.is_continuous_view():
+            return
+        page_num = self.document_strip.page_at(canvas_y / self.zoom_factor)
+        if page_num != self.current_page:
+            self.switch_continuous_page(page_num)
+            
+    def switch_continuous_page(self, page_num):
+        """Make another page of the continuous view current without touching the tiles already on screen"""
+        self.current_page = page_num
+        self.page_var.set(str(page_num + 1))
+        self.pdf_page_source = self.document_strip.page_source(page_num)
+        self.current_image = None
+        self.reset_edit_history()
+        self.schedule_page_prefetch()
+        self.highlight_page_thumbnail()
+        self.status_var.set(f"PDF Page {page_num + 1} of {self.total_pages} (zoom: {self.zoom_factor:.1f}x)")
+            
+    def track_visible_page(self):
+        """Follow the page in the middle of the continuous view as the user scrolls"""
+        if (not self.is_continuous_view() or self.edit_history.done or self.edit_history.undone
+                or self.selected_annotations):
+            # Undo, redo and Delete act on the current page - keep it until the user clicks on another one
+            return
+        top = self.canvas.canvasy(0) / self.zoom_factor
+        bottom = self.canvas.canvasy(self.canvas.winfo_height()) / self.zoom_factor
+        _x0, y0, _x1, y1 = self.document_strip.page_boxes[self.current_page]
+        if y0 < bottom and y1 > top:
+            return  # Still on screen - e.g. the last page, which can't scroll to the top
+        page_num = self.document_strip.page_at((top + bottom) / 2)
+        if page_num != self.current_page:
+            self.switch_continuous_page(page_num)
+            
+    def thumbnail_slot_height(self):
+        """Height of one page's slot in the thumbnail sidebar (image plus page number)"""
+        return self.thumbnail_cache.size[1] + 28
+        
+    def toggle_page_thumbnails(self):
+        """Show or hide the page thumbnail sidebar"""
+        self.show_page_thumbnails = self.page_thumbnails_var.get()
+        self.save_performance_settings()
+        self.reset_page_thumbnails()
+        
+    def reset_page_thumbnails(self):
+        """Lay the sidebar out for the open PDF, or hide it when there is none"""
+        self.thumbnail_cache.cancel('pages')
+        self.thumbnail_canvas.delete("all")
+        self.thumbnail_items = {}
+        self.thumbnail_photos = {}
+        
+        show = self.show_page_thumbnails and self.is_pdf and self.current_file is not None
+        panes = [str(pane) for pane in self.main_paned.panes()]
+        if not show:
+            if str(self.thumbnail_panel) in panes:
+                self.main_paned.forget(self.thumbnail_panel)
+            return
+        if str(self.thumbnail_panel) not in panes:
+            self.main_paned.add(self.thumbnail_panel, minsize=self.thumbnail_cache.size[0] + 40)
+            
+        # Only the slots near the visible part get items; the scroll region covers all pages
+        self.thumbnail_canvas.configure(scrollregion=(0, 0, 0, self.total_pages * self.thumbnail_slot_height()))
+        self.thumbnail_canvas.yview_moveto(0)
+        self.schedule_thumbnail_update()
+        
+    def on_thumbnail_scroll(self, first, last):
+        """Forward sidebar view changes to its scrollbar and fill in newly visible pages"""
+        self.thumbnail_scrollbar.set(first, last)
+        self.schedule_thumbnail_update()
+        
+    def schedule_thumbnail_update(self):
+        """Update the sidebar once Tk is idle, so a burst of scroll events costs one update"""
+        if self.thumbnail_update_pending is None:
+            self.thumbnail_update_pending = self.root.after_idle(self.update_page_thumbnails)
+            
+    def update_page_thumbnails(self):
+        """Create sidebar items for visible pages, request their thumbnails and drop far-away ones"""
+        self.thumbnail_update_pending = None
+        if not self.is_pdf or not self.current_file or not self.thumbnail_panel.winfo_ismapped():
             return
             
-        if page_key not in self.pdf_modifications:
-            self.pdf_modifications[page_key] = []
+        slot = self.thumbnail_slot_height()
+        top = self.thumbnail_canvas.canvasy(0)
+        bottom = top + max(self.thumbnail_canvas.winfo_height(), slot)
+        first = max(0, int(top // slot) - 2)
+        last = min(self.total_pages - 1, int(bottom // slot) + 2)
+        generation = self.get_file_generation(self.current_file)
+        
+        # Requests for pages that scrolled away are dropped from the worker's queue
+        self.thumbnail_cache.cancel('pages')
+        center_x = max(self.thumbnail_canvas.winfo_width(), self.thumbnail_cache.size[0] + 24) // 2
+        thumb_width, thumb_height = self.thumbnail_cache.size
+        for page_num in range(first, last + 1):
+            if page_num not in self.thumbnail_items:
+                y = page_num * slot + 4
+                frame = self.thumbnail_canvas.create_rectangle(center_x - thumb_width // 2 - 2, y,
+                                                               center_x + thumb_width // 2 + 2, y + thumb_height + 4,
+                                                               fill="white", outline="#aaaaaa")
+                image = self.thumbnail_canvas.create_image(center_x, y + 2, anchor=tk.N)
+                label = self.thumbnail_canvas.create_text(center_x, y + thumb_height + 14, text=str(page_num + 1),
+                                                          font=("Arial", 8))
+                self.thumbnail_items[page_num] = (frame, image, label)
+            if page_num not in self.thumbnail_photos:
+                thumbnail = self.thumbnail_cache.get(self.current_file, page_num, generation)
+                if thumbnail is not None:
+                    self.show_page_thumbnail(page_num, thumbnail)
+                else:
+                    self.thumbnail_cache.request(self.current_file, page_num, generation, 'pages')
+                    
+        # Keep the item count bounded for long documents
+        for page_num in [p for p in self.thumbnail_items if p < first - 20 or p > last + 20]:
+            for item in self.thumbnail_items.pop(page_num):
+                self.thumbnail_canvas.delete(item)
+            self.thumbnail_photos.pop(page_num, None)
+            
+        self.highlight_page_thumbnail()
+        self.start_thumbnail_poll()
+        
+    def show_page_thumbnail(self, page_num, thumbnail):
+        """Put a finished thumbnail into its sidebar slot"""
+        items = self.thumbnail_items.get(page_num)
+        if items is None:
+            return
+        frame, image, _label = items
+        photo = ImageTk.PhotoImage(thumbnail)
+        self.thumbnail_photos[page_num] = photo
+        self.thumbnail_canvas.itemconfig(image, image=photo)
+        # Shrink the white frame to the thumbnail's real shape
+        center_x = self.thumbnail_canvas.coords(image)[0]
+        y = page_num * self.thumbnail_slot_height() + 4
+        self.thumbnail_canvas.coords(frame, center_x - thumbnail.width // 2 - 2, y,
+                                     center_x + thumbnail.width // 2 + 2, y + thumbnail.height + 4)
+                                     
+    def highlight_page_thumbnail(self):
+        """Mark the current page in the sidebar and keep it in view"""
+        if not self.thumbnail_items and not self.thumbnail_panel.winfo_ismapped():
+            return
+        for page_num, (frame, _image, _label) in self.thumbnail_items.items():
+            current = page_num == self.current_page
+            self.thumbnail_canvas.itemconfig(frame, outline="#0066cc" if current else "#aaaaaa",
+                                             width=3 if current else 1)
+        slot = self.thumbnail_slot_height()
+        top = self.thumbnail_canvas.canvasy(0)
+        bottom = top + self.thumbnail_canvas.winfo_height()
+        y = self.current_page * slot
+        if y < top or y + slot > bottom:
+            self.thumbnail_canvas.yview_moveto(y / max(1, self.total_pages * slot))
+            
+    def on_thumbnail_click(self, event):
+        """Go to the page whose thumbnail was clicked"""
+        if not self.is_pdf or not self.total_pages:
+            return
+        page_num = int(self.thumbnail_canvas.canvasy(event.y) // self.thumbnail_slot_height())
+        if 0 <= page_num < self.total_pages and page_num != self.current_page:
+            self.page_prefetcher.cancel()
+            self.current_page = page_num
+            self.page_var.set(str(page_num + 1))
+            self.load_pdf_page()
             
-        modification = {
+    def on_file_list_hover(self, event):
+        """Preview the file under the mouse in the file panel"""
+        index = self.file_listbox.nearest(event.y)
+        if 0 <= index < len(self.file_list):
+            self.show_file_preview(self.file_list[index])
+            
+    def show_file_preview(self, filename):
+        """Show a file's first-page thumbnail under the file list, generating it in the background"""
+        if filename == self.file_preview_name and self.file_preview_photo is not None:
+            return
+        self.file_preview_name = filename
+        self.file_preview_photo = None
+        self.file_preview_label.config(image=self.file_preview_blank)
+        if not filename:
+            return
+        thumbnail = self.thumbnail_cache.get(filename, 0, self.get_file_generation(filename))
+        if thumbnail is not None:
+            self.file_preview_photo = ImageTk.PhotoImage(thumbnail)
+            self.file_preview_label.config(image=self.file_preview_photo)
+        else:
+            self.thumbnail_cache.cancel('files')
+            self.thumbnail_cache.request(filename, 0, self.get_file_generation(filename), 'files')
+            self.start_thumbnail_poll()
+            
+    def start_thumbnail_poll(self):
+        """Collect finished thumbnails on the Tk thread while any are outstanding"""
+        if self.thumbnail_poll is None and self.thumbnail_cache.outstanding > 0:
+            self.thumbnail_poll = self.root.after(30, self.poll_thumbnails)
+            
+    def poll_thumbnails(self):
+        """Show thumbnails the worker finished since the last poll"""
+        self.thumbnail_poll = None
+        while True:
+            try:
+                channel, (filename, page_num, generation) = self.thumbnail_cache.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.thumbnail_cache.outstanding -= 1
+            thumbnail = self.thumbnail_cache.get(filename, page_num, generation)
+            if thumbnail is None:
+                continue  # Cancelled or failed
+            if channel == 'pages' and filename == self.current_file and page_num not in self.thumbnail_photos:
+                self.show_page_thumbnail(page_num, thumbnail)
+            elif channel == 'files' and filename == self.file_preview_name:
+                self.file_preview_photo = ImageTk.PhotoImage(thumbnail)
+                self.file_preview_label.config(image=self.file_preview_photo)
+        self.start_thumbnail_poll()
+        
+    def get_file_generation(self, filename):
+        """Return the modification generation of a file, used in render cache keys"""
+        return self.file_generations.get(filename, 0)
+        
+    def mark_file_changed_on_disk(self, filename):
+        """Invalidate cached renders of a file that was just rewritten"""
+        self.file_generations[filename] = self.get_file_generation(filename) + 1
+        self.page_cache.invalidate_file(filename)
+        self.display_lists.invalidate_file(filename)
+        self.thumbnail_cache.forget_file(filename)
+        if self.page_cache.disk is not None:
+            # Old renders show the page before redaction - they must not stay readable on disk
+            self.page_cache.disk.forget_file(filename, self.file_generations[filename])
+        
+    def schedule_page_prefetch(self):
+        """Queue background renders of the pages around the current one"""
+        if not self.is_pdf or not self.current_file:
+            self.page_prefetcher.cancel()
+            return
+        self.page_prefetcher.schedule(self.current_file, self.current_page, self.total_pages,
+                                      self.zoom_factor, self.get_file_generation(self.current_file),
+                                      self.page_render_scale, self.color_mode)
+        
+    def get_pdf_page(self, page_num):
+        """Return a page of the open PDF, reopening the document if a save closed it"""
+        if not self.ensure_pdf_document_open():
+            raise RuntimeError("PDF document is not open")
+        return self.pdf_document[page_num]
+        
+    def ensure_edit_buffer(self):
+        """Return the full-resolution page image, rasterizing a PDF page the first time it is needed"""
+        if self.current_image is None and self.pdf_page_source is not None:
+            self.current_image = self.pdf_page_source.render_full()
+        return self.current_image
+        
+    def image_for_save(self):
+        """Return the page with its annotations burnt in, as it should be written to an image file"""
+        image = self.ensure_edit_buffer()
+        if image is None:
+            return None
+        annotations = self.get_page_annotations()
+        if annotations:
+            image = flatten_annotations(image, annotations)
+        # Bilevel scans stay bilevel
+        if image.mode == 'L' and image.info.get('source_mode') == '1':
+            # Edits are black or white (text edges get thresholded), so no dithering
+            return image.point(lambda v: 255 if v >= 128 else 0).convert('1', dither=Image.Dither.NONE)
+        return image
+        
+    def has_page(self):
+        """Check whether an image or PDF page is currently shown"""
+        return self.current_image is not None or self.pdf_page_source is not None
+        
+    def get_page_size(self):
+        """Return (width, height) of the current page in edit-buffer pixels"""
+        if self.current_image is not None:
+            return self.current_image.size
+        if self.pdf_page_source is not None:
+            return self.pdf_page_source.width, self.pdf_page_source.height
+        return 0, 0
+        
+    def crop_page_region(self, box):
+        """Return box (edit-buffer coordinates) of the current page as saved, without forcing an edit buffer"""
+        if self.current_image is not None:
+            image = self.current_image.crop(box)
+        else:
+            size = (box[2] - box[0], box[3] - box[1])
+            image = self.pdf_page_source.render_clip(box, size)
+        # Burn in the annotations so OCR can't read text under a redaction
+        return draw_annotations(image, self.get_page_annotations(), box, 1.0)
+        
+    def make_pdf_modification(self, mod_type, **kwargs):
+        """Build the PDF version of an edit; it is kept on the edit's annotation until the PDF is saved"""
+        return {
             'type': mod_type,
             'data': kwargs
         }
-        self.pdf_modifications[page_key].append(modification)
         
     def apply_pdf_modifications(self, pdf_doc, page_num):
         """Apply all stored modifications to a PDF page"""
-        page_key = f"{self.current_file}:{page_num}"
-        if page_key not in self.pdf_modifications:
-            print(f"DEBUG: No modifications for page_key: {page_key}")
+        modifications = self.get_document_modifications(self.current_file).pdf_modifications(page_num)
+        if not modifications:
+            print(f"DEBUG: No modifications for page {page_num}")
             return
         
-        print(f"DEBUG: Applying {len(self.pdf_modifications[page_key])} modifications to page {page_num}")
+        print(f"DEBUG: Applying {len(modifications)} modifications to page {page_num}")
         page = pdf_doc[page_num]
         
-        for mod in self.pdf_modifications[page_key]:
+        for mod in modifications:
             if mod['type'] == 'redaction':
                 # Apply redaction rectangle
                 data = mod['data']
@@ -1283,7 +3867,7 @@ class Redactor:
             print(f"DEBUG: Opening PDF copy: {self.current_file}")
             pdf_copy = fitz.open(self.current_file)
             print(f"DEBUG: PDF opened - needs_pass={pdf_copy.needs_pass}, is_encrypted={pdf_copy.is_encrypted}")
-            print(f"DEBUG: Current pdf_modifications keys: {list(self.pdf_modifications.keys())}")
+            print(f"DEBUG: Modified pages: {self.get_document_modifications(self.current_file).dirty_pages()}")
             
             # Check if PDF is encrypted and can't be modified
             if pdf_copy.needs_pass or pdf_copy.is_encrypted:
@@ -1332,6 +3916,7 @@ class Redactor:
                         print(f"DEBUG: Moving temp file to: {self.current_file}")
                         try:
                             shutil.move(temp_file, self.current_file)
+                            self.mark_file_changed_on_disk(self.current_file)
                             print(f"DEBUG: File move successful")
                         except Exception as e:
                             print(f"DEBUG: File move failed: {e}")
@@ -1339,8 +3924,9 @@ class Redactor:
                         self.status_var.set(f"PDF saved without encryption: {os.path.basename(self.current_file)}")
                         # Clear modifications as they are now saved
                         self.clear_pdf_modifications_for_file()
-                        # Reopen the now-unencrypted file (but don't reload the page - keep current display)
-                        self.ensure_pdf_document_open()
+                        # Show the saved file - the old page source would keep drawing the pre-save render
+                        self.document_strip = None
+                        self.load_pdf_page(reveal=False)
                     else:
                         # If save failed, clean up temp file and reopen the original
                         if os.path.exists(temp_file):
@@ -1348,8 +3934,8 @@ class Redactor:
                         self.ensure_pdf_document_open()
                     return success
             
-            # Apply all modifications to all pages
-            for page_num in range(len(pdf_copy)):
+            # Apply the modifications to the pages that have any
+            for page_num in self.get_document_modifications(self.current_file).dirty_pages():
                 self.apply_pdf_modifications(pdf_copy, page_num)
             
             # Save to a temporary file first, then replace original
@@ -1362,15 +3948,17 @@ class Redactor:
             # Replace original with modified version
             print(f"DEBUG: Moving temp to original: {self.current_file}")
             shutil.move(temp_file, self.current_file)
+            self.mark_file_changed_on_disk(self.current_file)
             print(f"DEBUG: Move complete, new file size: {os.path.getsize(self.current_file)} bytes")
             
-            # Reopen the PDF document (but don't reload the page image - keep current display)
-            self.current_page = current_page
-            self.ensure_pdf_document_open()
-            
             # Clear modifications as they are now saved
             self.clear_pdf_modifications_for_file()
             
+            # Show the saved file - the old page source would keep drawing the pre-save render
+            self.current_page = current_page
+            self.document_strip = None
+            self.load_pdf_page(reveal=False)
+            
             return True
             
         except Exception as e:
@@ -1409,8 +3997,8 @@ class Redactor:
                     self.status_var.set(f"Created unencrypted PDF: {os.path.basename(save_path)}")
                 return success
             
-            # Apply all modifications to all pages
-            for page_num in range(len(pdf_source)):
+            # Apply the modifications to the pages that have any
+            for page_num in self.get_document_modifications(self.current_file).dirty_pages():
                 self.apply_pdf_modifications(pdf_source, page_num)
             
             # Save to the new location
@@ -1436,32 +4024,25 @@ class Redactor:
             saved_pages = []
             
             # Find all pages with modifications
-            modified_pages = set()
-            for key in self.pdf_modifications.keys():
-                if key.startswith(f"{self.current_file}:"):
-                    page_num = int(key.split(":")[-1])
-                    modified_pages.add(page_num)
+            modifications = self.get_document_modifications(self.current_file)
+            modified_pages = modifications.dirty_pages()
             
             if not modified_pages:
                 messagebox.showinfo("No Changes", "No modifications found to save")
                 return
             
-            # Save each modified page
-            for page_num in sorted(modified_pages):
-                # Temporarily switch to this page to render it
-                old_page = self.current_page
-                self.current_page = page_num
-                self.load_pdf_page()
-                
-                # Save this page
+            # Rasterize all modified pages at edit-buffer resolution in parallel
+            generation = self.get_file_generation(self.current_file)
+            renders = [(page_num, self.render_engine.submit(self.current_file, page_num, generation,
+                                                            self.page_render_scale(page_num),
+                                                            color_mode=self.color_mode))
+                       for page_num in modified_pages]
+            
+            # Save each modified page with its annotations burnt in
+            for page_num, render in renders:
                 save_path = f"{base_name}_page_{page_num + 1}_redacted.png"
-                self.current_image.save(save_path, quality=95)
+                flatten_annotations(render.result(), modifications.pages[page_num]).save(save_path, quality=95)
                 saved_pages.append(os.path.basename(save_path))
-                
-                # Restore original page
-                self.current_page = old_page
-                
-            self.load_pdf_page()  # Reload original page
             
             pages_list = ", ".join(saved_pages[:3])  # Show first 3
             if len(saved_pages) > 3:
@@ -1497,6 +4078,7 @@ class Redactor:
             new_doc = fitz.open()
             
             # Copy each page to remove encryption
+            modified_pages = set(self.get_document_modifications(self.current_file).dirty_pages())
             for page_num in range(len(source_doc)):
                 # Get the page from source document
                 source_page = source_doc[page_num]
@@ -1508,15 +4090,9 @@ class Redactor:
                 # Copy content from source page (this removes encryption)
                 new_page.show_pdf_page(rect, source_doc, page_num)
                 
-                # Debug: Check if we have modifications for this page
-                page_key = f"{self.current_file}:{page_num}"
-                if page_key in self.pdf_modifications:
-                    print(f"DEBUG: Applying {len(self.pdf_modifications[page_key])} modifications to page {page_num}")
-                else:
-                    print(f"DEBUG: No modifications found for page {page_num} (key: {page_key})")
-                
                 # Apply modifications for this page
-                self.apply_pdf_modifications_to_page(new_doc, new_page, page_num)
+                if page_num in modified_pages:
+                    self.apply_pdf_modifications_to_page(new_doc, new_page, page_num)
             
             # Close source document
             source_doc.close()
@@ -1559,17 +4135,18 @@ class Redactor:
                 self.current_page = page_num
                 self.load_pdf_page()
                 
-                if not self.current_image:
+                page_image = self.image_for_save()
+                if not page_image:
                     continue
                 
                 # Convert PIL image to bytes
                 import io
                 img_bytes = io.BytesIO()
-                self.current_image.save(img_bytes, format='PNG')
+                page_image.save(img_bytes, format='PNG')
                 img_bytes.seek(0)
                 
                 # Create new page with image dimensions
-                img_width, img_height = self.current_image.size
+                img_width, img_height = page_image.size
                 # Convert to points (72 DPI)
                 page_width = img_width * 72 / 300  # Assume 300 DPI
                 page_height = img_height * 72 / 300
@@ -1602,11 +4179,9 @@ class Redactor:
             
     def apply_pdf_modifications_to_page(self, pdf_doc, page, page_num):
         """Apply modifications to a specific page object"""
-        page_key = f"{self.current_file}:{page_num}"
-        if page_key not in self.pdf_modifications:
-            return
-            
-        for mod in self.pdf_modifications[page_key]:
+        modifications = self.get_document_modifications(self.current_file).pdf_modifications(page_num)
+        print(f"DEBUG: Applying {len(modifications)} modifications to page {page_num}")
+        for mod in modifications:
             if mod['type'] == 'redaction':
                 # Apply redaction rectangle
                 data = mod['data']
@@ -1661,37 +4236,152 @@ class Redactor:
         if not self.current_file:
             return
             
-        # Remove all modifications for this file
-        keys_to_remove = [key for key in self.pdf_modifications.keys() if key.startswith(f"{self.current_file}:")]
-        for key in keys_to_remove:
-            del self.pdf_modifications[key]
-            
+        # They are part of the file now, so its pages no longer draw them on top
+        self.get_document_modifications(self.current_file).clear()
+        self.reset_edit_history()
+        
+    def get_document_modifications(self, filename):
+        """Return the unsaved modifications of a file"""
+        modifications = self.modifications.get(filename)
+        if modifications is None:
+            modifications = self.modifications[filename] = DocumentModifications()
+        return modifications
+        
+    def get_page_annotations(self, page_num=None):
+        """Return the live annotations of a page of the current file (the current page by default)"""
+        if page_num is None:
+            page_num = self.current_page if self.is_pdf else 0
+        return self.get_document_modifications(self.current_file).page(page_num)
+        
     def display_image_on_canvas(self):
         """Display the current image on canvas with zoom"""
-        if not self.current_image:
+        self.discard_view_update('zoom')  # This render supersedes a queued zoom
+        self.panner.stop()  # Don't carry a flick over to another page or zoom
+        if self.continuous_scroll and self.is_pdf and self.pdf_page_source is not None:
+            self.display_document_strip()
+        elif self.is_pdf:
+            if self.pdf_page_source is not None:
+                # Rasterized by MuPDF at the display zoom, annotations drawn over each tile
+                self.tile_renderer.set_source(AnnotatedSource(self.pdf_page_source,
+                                                              self.get_document_modifications(self.current_file),
+                                                              self.current_page), self.zoom_factor)
+        elif self.current_image is not None:
+            # Zoom levels are built once per image; annotations never touch them
+            if self.image_pyramid is None or self.image_pyramid.base is not self.current_image:
+                self.image_pyramid = ImagePyramid(self.current_image)
+                
+            # Only tiles intersecting the viewport are resampled now; the rest are
+            # created as the canvas scrolls, so cost follows window size, not page size
+            self.tile_renderer.set_source(AnnotatedSource(self.image_pyramid,
+                                                          self.get_document_modifications(self.current_file), 0),
+                                          self.zoom_factor)
+        self.draw_selection_outlines()
+        
+    def display_document_strip(self):
+        """Show every page of the PDF stacked vertically, each with its annotations on top"""
+        strip = self.get_document_strip()
+        # Keep the same part of the document in view across zoom changes
+        keep_position = self.tile_renderer.source is strip
+        first = self.canvas.yview()[0]
+        strip.modifications = self.get_document_modifications(self.current_file)
+        
+        # The scroll region spans the whole document but only tiles near the
+        # viewport exist, and the strip keeps just a few page renders alive
+        self.tile_renderer.set_source(strip, self.zoom_factor)
+        if keep_position:
+            self.canvas.yview_moveto(first)
+        
+    def refresh_display_region(self, box):
+        """Repaint the tiles under box (edit-buffer coordinates of the current page) after an annotation changed"""
+        if self.is_continuous_view():
+            x0, y0, _x1, _y1 = self.document_strip.page_boxes[self.current_page]
+            box = (box[0] + x0, box[1] + y0, box[2] + x0, box[3] + y0)
+        self.tile_renderer.invalidate_region(box)
+        
+    def clear_canvas(self):
+        """Remove the page tiles and any overlays from the canvas"""
+        self.tile_renderer.clear()
+        self.canvas.delete("all")
+        self.selection_outlines = []
+        self.image_pyramid = None
+        if not self.current_file:
+            # Nothing is open any more - drop the page thumbnails too
+            self.reset_page_thumbnails()
+            self.show_file_preview(None)
+        
+    def on_canvas_xscroll(self, first, last):
+        """Forward horizontal view changes to the scrollbar and reveal new tiles"""
+        self.h_scrollbar.set(first, last)
+        self.tile_renderer.schedule_update()
+        
+    def on_canvas_yscroll(self, first, last):
+        """Forward vertical view changes to the scrollbar and reveal new tiles"""
+        self.v_scrollbar.set(first, last)
+        self.tile_renderer.schedule_update()
+        self.track_visible_page()
+        
+    def on_canvas_configure(self, event):
+        """Handle canvas resize"""
+        self.tile_renderer.schedule_update()
+        size = (event.width, event.height)
+        if size == self.canvas_size:
             return
-            
-        # Apply zoom
-        display_width = int(self.current_image.width * self.zoom_factor)
-        display_height = int(self.current_image.height * self.zoom_factor)
+        self.canvas_size = size
         
-        if display_width > 0 and display_height > 0:
-            resized_image = self.current_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
-            self.display_image = ImageTk.PhotoImage(resized_image)
-            
-            # Clear canvas and add image
-            self.canvas.delete("all")
-            self.canvas_image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.display_image)
-            
-            # Add a subtle border around the document to show boundaries
-            img_width = resized_image.width
-            img_height = resized_image.height
-            self.canvas.create_rectangle(0, 0, img_width, img_height, 
-                                       outline="#cccccc", width=1, fill="")
+        # A window drag sends a stream of these; re-fit once it stops
+        if self.fit_mode:
+            if self.auto_fit_pending is not None:
+                self.root.after_cancel(self.auto_fit_pending)
+            self.auto_fit_pending = self.root.after(self.auto_fit_delay, self.apply_auto_fit)
             
-            # Update scroll region
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    def fit_zoom(self, mode):
+        """Return the zoom that fits the current page's width or whole page into the canvas, or None"""
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        page_width, page_height = self.get_page_size()
+        if canvas_width <= 1 or canvas_height <= 1 or not page_width or not page_height:
+            return None
+        margin = 20  # Room for the page border and a scrollbar appearing
+        zoom = (canvas_width - margin) / page_width
+        if mode == 'page':
+            zoom = min(zoom, (canvas_height - margin) / page_height)
+        return max(0.1, zoom)
+        
+    def apply_auto_fit(self):
+        """Re-fit the current page to the canvas in the current auto-fit mode"""
+        self.auto_fit_pending = None
+        if not self.fit_mode or not self.has_page():
+            return
+        zoom = self.fit_zoom(self.fit_mode)
+        if zoom is None or abs(zoom - self.zoom_factor) < 0.001:
+            return  # Same zoom - the tiles and cached renders already on screen stay
+        self.zoom_factor = zoom
+        if self.current_file:
+            self.file_zoom_levels[self.current_file] = self.zoom_factor
+            self.save_zoom_settings()
+        self.display_image_on_canvas()
+        label = "width" if self.fit_mode == 'width' else "page"
+        self.status_var.set(f"Fit {label} - Zoom: {self.zoom_factor:.1f}x")
+        
+    def set_fit_mode(self, mode):
+        """Switch auto-fit for the current file ('width', 'page' or None)"""
+        if mode == self.fit_mode:
+            return
+        self.fit_mode = mode
+        self.fit_mode_var.set(mode or "")
+        if self.current_file:
+            if mode:
+                self.file_fit_modes[self.current_file] = mode
+            else:
+                self.file_fit_modes.pop(self.current_file, None)
+            self.save_zoom_settings()
+        if mode:
+            self.apply_auto_fit()
             
+    def on_fit_mode_menu(self):
+        """Apply the auto-fit mode picked in the View menu"""
+        self.set_fit_mode(self.fit_mode_var.get() or None)
+        
     def toggle_redact_mode(self):
         """Toggle redaction mode"""
         self.redacting = not self.redacting
@@ -1837,9 +4527,7 @@ class Redactor:
             self.status_var.set("OCR mode: Click and drag to select text region to extract")
         else:
             # Clear any OCR rectangle when turning off mode
-            if self.ocr_rect:
-                self.canvas.delete(self.ocr_rect)
-                self.ocr_rect = None
+            self.rubber_band.cancel()
             self.ocr_start_x = None
             self.ocr_start_y = None
             self.ocr_button.config(bg="#e0e0e0", activebackground="#e0e0e0", text="OCR Mode")
@@ -1866,9 +4554,7 @@ class Redactor:
             self.status_var.set("Highlight mode: Click and drag to highlight areas")
         else:
             # Clear any highlight rectangle when turning off mode
-            if self.highlight_rect:
-                self.canvas.delete(self.highlight_rect)
-                self.highlight_rect = None
+            self.rubber_band.cancel()
             self.highlight_start_x = None
             self.highlight_start_y = None
             self.highlight_button.config(bg="#e0e0e0", activebackground="#e0e0e0", text="Highlight Mode")
@@ -2004,41 +4690,174 @@ class Redactor:
             else:
                 self.signature_size_var.set(str(self.default_signature_size))
             
-    def save_image_state(self):
-        """Save current image state for undo functionality"""
-        if self.current_image:
-            # Add current state to history
-            self.image_history.append(self.current_image.copy())
-            
-            # Limit history size
-            if len(self.image_history) > self.max_history:
-                self.image_history.pop(0)
+    def add_annotation(self, annotation):
+        """Put a new annotation on top of the current page and log it for undo"""
+        entries = [(len(self.get_page_annotations()), annotation)]
+        self.insert_annotations(entries)
+        self.edit_history.record(('add', entries))
+        self.update_undo_buttons()
+        
+    def insert_annotations(self, entries):
+        """Place (index, annotation) entries, lowest index first, on the current page"""
+        annotations = self.get_page_annotations()
+        for index, annotation in entries:
+            annotations.insert(index, annotation)
+        self.mark_page_modified()
+        self.refresh_display_region(union_box(annotation.bounds() for _index, annotation in entries))
+        
+    def remove_annotations(self, entries):
+        """Take (index, annotation) entries, lowest index first, off the current page"""
+        annotations = self.get_page_annotations()
+        # Topmost first, so the recorded indices stay valid for putting them back
+        for _index, annotation in reversed(entries):
+            annotations.remove(annotation)
+        removed = [annotation for _index, annotation in entries]
+        if any(annotation in removed for annotation in self.selected_annotations):
+            self.select_annotations([annotation for annotation in self.selected_annotations
+                                     if annotation not in removed])
+        self.mark_page_modified()
+        self.refresh_display_region(union_box(annotation.bounds() for annotation in removed))
+        
+    def move_annotations(self, annotations, dx, dy):
+        """Shift annotations by (dx, dy) edit-buffer pixels, repainting where they were and where they are"""
+        old_box = union_box(annotation.bounds() for annotation in annotations)
+        page_annotations = self.get_page_annotations()
+        transform = self.get_page_transform()
+        for annotation in annotations:
+            annotation.move(dx, dy)
+            page_annotations.reindex(annotation)
+            if self.is_pdf and annotation.pdf_modification is not None:
+                # Only the position changes; sizes, colours and signature data stay as they were
+                data = annotation.pdf_modification['data']
+                for x_key, y_key in (('x', 'y'), ('x1', 'y1'), ('x2', 'y2')):
+                    if x_key in data:
+                        data[x_key], data[y_key] = transform.to_pdf(annotation.params[x_key],
+                                                                    annotation.params[y_key])
+        self.mark_page_modified()
+        self.refresh_display_region(old_box)
+        self.refresh_display_region(union_box(annotation.bounds() for annotation in annotations))
+        self.draw_selection_outlines()
+        
+    def resize_annotation(self, annotation, x2, y2):
+        """Move the bottom-right corner of a redaction or highlight, repainting its old and new box"""
+        old_box = annotation.bounds()
+        annotation.resize(x2, y2)
+        self.get_page_annotations().reindex(annotation)
+        if self.is_pdf and annotation.pdf_modification is not None:
+            data = annotation.pdf_modification['data']
+            data['x2'], data['y2'] = self.get_page_transform().to_pdf(x2, y2)
+        self.mark_page_modified()
+        self.refresh_display_region(old_box)
+        self.refresh_display_region(annotation.bounds())
+        self.draw_selection_outlines()
+        
+    def mark_page_modified(self):
+        """Record that the current page's annotations changed"""
+        self.get_document_modifications(self.current_file).mark_dirty(self.current_page if self.is_pdf else 0)
+        self.file_modified = True
+        
+    def select_annotations(self, annotations):
+        """Make a list of annotations of the current page the selection, outlined on the canvas"""
+        self.selected_annotations = annotations
+        self.annotation_drag = None
+        self.annotation_resize = None
+        self.draw_selection_outlines()
+        
+    def draw_selection_outlines(self):
+        """Draw a dashed outline around each selected annotation at the current zoom"""
+        for item in self.selection_outlines:
+            self.canvas.delete(item)
+        self.selection_outlines = []
+        self.resize_handle = None
+        origin_x, origin_y = 0, 0
+        if self.selected_annotations and self.is_continuous_view():
+            origin_x, origin_y = self.document_strip.page_display_origin(self.current_page, self.zoom_factor)
+        zoom = self.zoom_factor
+        for annotation in self.selected_annotations:
+            x0, y0, x1, y1 = annotation.bounds()
+            self.selection_outlines.append(self.canvas.create_rectangle(
+                origin_x + x0 * zoom - 2, origin_y + y0 * zoom - 2,
+                origin_x + x1 * zoom + 2, origin_y + y1 * zoom + 2,
+                outline="#0078d7", dash=(4, 2), width=1))
+        if len(self.selected_annotations) == 1 and self.selected_annotations[0].kind in ('redaction', 'highlight'):
+            # Boxes can be resized by their bottom-right corner
+            _x0, _y0, x1, y1 = self.selected_annotations[0].bounds()
+            corner_x, corner_y = origin_x + x1 * zoom + 2, origin_y + y1 * zoom + 2
+            self.resize_handle = self.canvas.create_rectangle(corner_x - 4, corner_y - 4, corner_x + 4, corner_y + 4,
+                                                              outline="#0078d7", fill="white", width=1)
+            self.selection_outlines.append(self.resize_handle)
                 
-            # Update undo button state
-            self.undo_button.config(state='normal' if self.image_history else 'disabled')
+    def delete_selected_annotations(self):
+        """Delete the selected annotations as one undo step; returns False when nothing is selected"""
+        if not self.selected_annotations:
+            return False
+        annotations = self.get_page_annotations()
+        entries = sorted(((annotations.index(annotation), annotation) for annotation in self.selected_annotations),
+                         key=lambda entry: entry[0])
+        self.remove_annotations(entries)
+        self.edit_history.record(('delete', entries))
+        self.update_undo_buttons()
+        self.status_var.set(f"Deleted {len(entries)} annotation{'s' if len(entries) != 1 else ''}")
+        return True
+        
+    def on_delete_key(self):
+        """Delete the selected annotations, or else remove the selected file from the list"""
+        if not self.delete_selected_annotations():
+            self.remove_selected_file()
             
+    def update_undo_buttons(self):
+        """Enable the undo/redo buttons according to the edit log"""
+        self.undo_button.config(state='normal' if self.edit_history.done else 'disabled')
+        self.redo_button.config(state='normal' if self.edit_history.undone else 'disabled')
+        
+    def reset_edit_history(self):
+        """Start a fresh undo log (and drop the selection) for a newly loaded page"""
+        self.edit_history.reset()
+        self.select_annotations([])
+        self.update_undo_buttons()
+        
     def undo_action(self):
         """Undo the last action"""
-        if self.image_history and self.current_image:
-            # Restore previous state
-            self.current_image = self.image_history.pop()
-            
-            # For PDFs, also remove the last modification from the PDF modifications list
-            if self.is_pdf:
-                page_key = self.get_pdf_page_key()
-                if page_key and page_key in self.pdf_modifications and self.pdf_modifications[page_key]:
-                    self.pdf_modifications[page_key].pop()
-            
-            # Refresh display
-            self.display_image_on_canvas()
-            
-            # Update undo button state
-            self.undo_button.config(state='normal' if self.image_history else 'disabled')
+        action = self.edit_history.pop_undo() if self.has_page() else None
+        if action is None:
+            self.status_var.set("Nothing to undo")
+            return
             
-            self.status_var.set(f"Undone - {len(self.image_history)} undo steps remaining")
+        kind = action[0]
+        if kind == 'add':
+            self.remove_annotations(action[1])
+        elif kind == 'delete':
+            self.insert_annotations(action[1])
+        elif kind == 'resize':
+            _kind, annotation, old_corner, _new_corner = action
+            self.resize_annotation(annotation, *old_corner)
         else:
-            self.status_var.set("Nothing to undo")
+            _kind, annotations, (dx, dy) = action
+            self.move_annotations(annotations, -dx, -dy)
+        self.update_undo_buttons()
+        self.status_var.set(f"Undone - {len(self.edit_history.done)} undo steps remaining")
+        
+    def redo_action(self):
+        """Redo the last undone action"""
+        action = self.edit_history.pop_redo() if self.has_page() else None
+        if action is None:
+            self.status_var.set("Nothing to redo")
+            return
             
+        kind = action[0]
+        if kind == 'add':
+            self.insert_annotations(action[1])
+        elif kind == 'delete':
+            self.remove_annotations(action[1])
+        elif kind == 'resize':
+            _kind, annotation, _old_corner, new_corner = action
+            self.resize_annotation(annotation, *new_corner)
+        else:
+            _kind, annotations, (dx, dy) = action
+            self.move_annotations(annotations, dx, dy)
+        self.update_undo_buttons()
+        self.status_var.set(f"Redone - {len(self.edit_history.undone)} redo steps remaining")
+        
     def save_signature_path(self, file_path):
         """Save signature file path for future sessions"""
         try:
@@ -2410,95 +5229,109 @@ class Redactor:
             except:
                 pass
                 
-        if not self.current_image:
+        if not self.has_page():
             return
             
         if self.text_mode:
             # Add text at click position
             canvas_x = self.canvas.canvasx(event.x)
             canvas_y = self.canvas.canvasy(event.y)
+            self.focus_page_at(canvas_x, canvas_y)
             text = simpledialog.askstring("Add Text", "Enter text to add:")
             if text:
-                self.add_text(canvas_x, canvas_y, text)
+                self.add_text(*self.canvas_to_page(canvas_x, canvas_y), text)
         elif self.signature_mode and self.signatures:
             # Place signature
             canvas_x = self.canvas.canvasx(event.x)
             canvas_y = self.canvas.canvasy(event.y)
-            self.place_signature(canvas_x, canvas_y)
+            self.focus_page_at(canvas_x, canvas_y)
+            self.place_signature(*self.canvas_to_page(canvas_x, canvas_y))
         elif self.redacting:
             # Start redaction
             self.redaction_start_x = self.canvas.canvasx(event.x)
             self.redaction_start_y = self.canvas.canvasy(event.y)
+            self.focus_page_at(self.redaction_start_x, self.redaction_start_y)
+            self.rubber_band.begin(self.redaction_start_x, self.redaction_start_y, "red",
+                                   self.describe_selection)
         elif self.ocr_mode:
-            # Clear any previous OCR rectangle before starting new selection
-            if self.ocr_rect:
-                self.canvas.delete(self.ocr_rect)
-                self.ocr_rect = None
-            # Start OCR selection
+            # Start OCR selection (replaces any previous rectangle)
             self.ocr_start_x = self.canvas.canvasx(event.x)
             self.ocr_start_y = self.canvas.canvasy(event.y)
+            self.focus_page_at(self.ocr_start_x, self.ocr_start_y)
+            self.rubber_band.begin(self.ocr_start_x, self.ocr_start_y, "blue", self.describe_selection)
         elif self.highlight_mode:
-            # Clear any previous highlight rectangle before starting new selection
-            if self.highlight_rect:
-                self.canvas.delete(self.highlight_rect)
-                self.highlight_rect = None
-            # Start highlight selection
+            # Start highlight selection (replaces any previous rectangle)
             self.highlight_start_x = self.canvas.canvasx(event.x)
             self.highlight_start_y = self.canvas.canvasy(event.y)
-            
+            self.focus_page_at(self.highlight_start_x, self.highlight_start_y)
+            self.rubber_band.begin(self.highlight_start_x, self.highlight_start_y, "yellow",
+                                   self.describe_selection)
+        else:
+            # No tool active: pick annotations to move or delete
+            canvas_x = self.canvas.canvasx(event.x)
+            canvas_y = self.canvas.canvasy(event.y)
+            self.focus_page_at(canvas_x, canvas_y)
+            if self.resize_handle is not None:
+                x0, y0, x1, y1 = self.canvas.coords(self.resize_handle)
+                if x0 - 2 <= canvas_x <= x1 + 2 and y0 - 2 <= canvas_y <= y1 + 2:
+                    self.annotation_resize = self.selected_annotations[0]
+                    return
+            page_x, page_y = self.canvas_to_page(canvas_x, canvas_y)
+            annotation = self.get_page_annotations().at(page_x / self.zoom_factor, page_y / self.zoom_factor)
+            if annotation is None:
+                # Empty spot - drag a marquee to select every annotation it touches
+                self.select_annotations([])
+                self.marquee_start = (canvas_x, canvas_y)
+                self.rubber_band.begin(canvas_x, canvas_y, "#0078d7", self.describe_selection)
+            else:
+                # Dragging any selected annotation moves the whole selection
+                if annotation not in self.selected_annotations:
+                    self.select_annotations([annotation])
+                self.annotation_drag = (canvas_x, canvas_y,
+                                        [self.canvas.coords(item) for item in self.selection_outlines])
+                
     def on_canvas_drag(self, event):
         """Handle canvas drag"""
-        if not self.current_image:
+        if not self.has_page():
             return
         
-        # Handle redaction mode
-        if self.redacting and self.redaction_start_x is not None:
-            # Update redaction rectangle
-            if self.redaction_rect:
-                self.canvas.delete(self.redaction_rect)
-                
-            current_x = self.canvas.canvasx(event.x)
-            current_y = self.canvas.canvasy(event.y)
-            
-            self.redaction_rect = self.canvas.create_rectangle(
-                self.redaction_start_x, self.redaction_start_y,
-                current_x, current_y,
-                outline="red", width=2, dash=(5, 5)
-            )
-        
-        # Handle OCR mode
-        elif self.ocr_mode and self.ocr_start_x is not None:
-            # Update OCR selection rectangle
-            if self.ocr_rect:
-                self.canvas.delete(self.ocr_rect)
-                
-            current_x = self.canvas.canvasx(event.x)
-            current_y = self.canvas.canvasy(event.y)
-            
-            self.ocr_rect = self.canvas.create_rectangle(
-                self.ocr_start_x, self.ocr_start_y,
-                current_x, current_y,
-                outline="blue", width=2, dash=(5, 5)
-            )
-        
-        # Handle highlight mode
-        elif self.highlight_mode and self.highlight_start_x is not None:
-            # Update highlight selection rectangle
-            if self.highlight_rect:
-                self.canvas.delete(self.highlight_rect)
-                
-            current_x = self.canvas.canvasx(event.x)
-            current_y = self.canvas.canvasy(event.y)
-            
-            self.highlight_rect = self.canvas.create_rectangle(
-                self.highlight_start_x, self.highlight_start_y,
-                current_x, current_y,
-                outline="yellow", width=2, dash=(5, 5)
-            )
+        # Redaction, OCR and highlight selections just move the overlay started on click
+        selecting = ((self.redacting and self.redaction_start_x is not None)
+                     or (self.ocr_mode and self.ocr_start_x is not None)
+                     or (self.highlight_mode and self.highlight_start_x is not None))
+        if selecting or self.marquee_start is not None:
+            self.rubber_band.update(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        elif self.annotation_drag is not None:
+            # Only the outlines follow the pointer; the annotations are repainted once, on release
+            start_x, start_y, outline_coords = self.annotation_drag
+            dx = self.canvas.canvasx(event.x) - start_x
+            dy = self.canvas.canvasy(event.y) - start_y
+            for item, coords in zip(self.selection_outlines, outline_coords):
+                self.canvas.coords(item, coords[0] + dx, coords[1] + dy, coords[2] + dx, coords[3] + dy)
+        elif self.annotation_resize is not None:
+            # Stretch the outline and handle; the box is repainted once, on release
+            canvas_x = self.canvas.canvasx(event.x)
+            canvas_y = self.canvas.canvasy(event.y)
+            outline, handle = self.selection_outlines
+            x0, y0, _x1, _y1 = self.canvas.coords(outline)
+            self.canvas.coords(outline, x0, y0, max(x0, canvas_x), max(y0, canvas_y))
+            self.canvas.coords(handle, canvas_x - 4, canvas_y - 4, canvas_x + 4, canvas_y + 4)
+            
+    def describe_selection(self, x0, y0, x1, y1):
+        """Return the size of a canvas selection in page units for the drag label"""
+        page_x0, page_y0 = self.canvas_to_page(x0, y0)
+        page_x1, page_y1 = self.canvas_to_page(x1, y1)
+        # Page canvas coordinates are zoomed image pixels
+        width = abs(page_x1 - page_x0) / self.zoom_factor
+        height = abs(page_y1 - page_y0) / self.zoom_factor
+        if self.is_pdf:
+            transform = self.get_page_transform()
+            return f"{transform.to_pdf_length(width):.0f} × {transform.to_pdf_length(height):.0f} pt"
+        return f"{width:.0f} × {height:.0f} px"
             
     def on_canvas_release(self, event):
         """Handle canvas release"""
-        if not self.current_image:
+        if not self.has_page():
             return
         
         # Handle redaction mode
@@ -2507,12 +5340,11 @@ class Redactor:
             end_y = self.canvas.canvasy(event.y)
             
             # Apply redaction to image
-            self.apply_redaction(self.redaction_start_x, self.redaction_start_y, end_x, end_y)
+            self.apply_redaction(*self.canvas_to_page(self.redaction_start_x, self.redaction_start_y),
+                                 *self.canvas_to_page(end_x, end_y))
             
             # Clear selection
-            if self.redaction_rect:
-                self.canvas.delete(self.redaction_rect)
-                self.redaction_rect = None
+            self.rubber_band.cancel()
             self.redaction_start_x = None
             self.redaction_start_y = None
         
@@ -2522,12 +5354,11 @@ class Redactor:
             end_y = self.canvas.canvasy(event.y)
             
             # Extract text from selected region
-            self.extract_text_from_region(self.ocr_start_x, self.ocr_start_y, end_x, end_y)
+            self.extract_text_from_region(*self.canvas_to_page(self.ocr_start_x, self.ocr_start_y),
+                                          *self.canvas_to_page(end_x, end_y))
             
             # Clear selection
-            if self.ocr_rect:
-                self.canvas.delete(self.ocr_rect)
-                self.ocr_rect = None
+            self.rubber_band.cancel()
             self.ocr_start_x = None
             self.ocr_start_y = None
         
@@ -2537,18 +5368,65 @@ class Redactor:
             end_y = self.canvas.canvasy(event.y)
             
             # Apply highlight to image
-            self.apply_highlight(self.highlight_start_x, self.highlight_start_y, end_x, end_y)
+            self.apply_highlight(*self.canvas_to_page(self.highlight_start_x, self.highlight_start_y),
+                                 *self.canvas_to_page(end_x, end_y))
             
             # Clear selection
-            if self.highlight_rect:
-                self.canvas.delete(self.highlight_rect)
-                self.highlight_rect = None
+            self.rubber_band.cancel()
             self.highlight_start_x = None
             self.highlight_start_y = None
             
+        # Select every annotation the marquee touches
+        elif self.marquee_start is not None:
+            start_x, start_y = self.marquee_start
+            self.marquee_start = None
+            self.rubber_band.cancel()
+            x0, y0 = self.canvas_to_page(start_x, start_y)
+            x1, y1 = self.canvas_to_page(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+            zoom = self.zoom_factor
+            box = (min(x0, x1) / zoom, min(y0, y1) / zoom, max(x0, x1) / zoom, max(y0, y1) / zoom)
+            self.select_annotations(self.get_page_annotations().overlapping(box))
+            count = len(self.selected_annotations)
+            self.status_var.set(f"Selected {count} annotation{'s' if count != 1 else ''}")
+            
+        # Finish moving the selected annotations
+        elif self.annotation_drag is not None:
+            start_x, start_y, _outline_coords = self.annotation_drag
+            self.annotation_drag = None
+            dx = round((self.canvas.canvasx(event.x) - start_x) / self.zoom_factor)
+            dy = round((self.canvas.canvasy(event.y) - start_y) / self.zoom_factor)
+            if dx or dy:
+                annotations = list(self.selected_annotations)
+                self.move_annotations(annotations, dx, dy)
+                self.edit_history.record(('move', annotations, (dx, dy)))
+                self.update_undo_buttons()
+                self.status_var.set(f"Moved {len(annotations)} annotation{'s' if len(annotations) != 1 else ''} "
+                                    f"by ({dx},{dy})")
+            else:
+                self.draw_selection_outlines()
+                
+        # Finish resizing the selected box
+        elif self.annotation_resize is not None:
+            annotation = self.annotation_resize
+            self.annotation_resize = None
+            page_x, page_y = self.canvas_to_page(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+            page_width, page_height = self.get_page_size()
+            # The handle is centred 2 canvas pixels past the box, which includes x2, y2
+            p = annotation.params
+            x2 = max(p['x1'], min(page_width, round((page_x - 2) / self.zoom_factor) - 1))
+            y2 = max(p['y1'], min(page_height, round((page_y - 2) / self.zoom_factor) - 1))
+            old_corner = (p['x2'], p['y2'])
+            if (x2, y2) != old_corner:
+                self.resize_annotation(annotation, x2, y2)
+                self.edit_history.record(('resize', annotation, old_corner, (x2, y2)))
+                self.update_undo_buttons()
+                self.status_var.set(f"Resized {annotation.kind}: ({p['x1']},{p['y1']}) to ({x2},{y2})")
+            else:
+                self.draw_selection_outlines()
+            
     def on_right_click(self, event):
         """Handle right-click for context menu"""
-        if not self.current_image:
+        if not self.has_page():
             return
         
         # Show context menu with save options
@@ -2587,48 +5465,36 @@ class Redactor:
         if text:
             canvas_x = self.canvas.canvasx(event.x)
             canvas_y = self.canvas.canvasy(event.y)
-            self.add_text(canvas_x, canvas_y, text)
+            self.focus_page_at(canvas_x, canvas_y)
+            self.add_text(*self.canvas_to_page(canvas_x, canvas_y), text)
             
     def place_signature_at_position(self, event):
         """Place signature at the right-click position"""
         canvas_x = self.canvas.canvasx(event.x)
         canvas_y = self.canvas.canvasy(event.y)
-        self.place_signature(canvas_x, canvas_y)
+        self.focus_page_at(canvas_x, canvas_y)
+        self.place_signature(*self.canvas_to_page(canvas_x, canvas_y))
         
     def on_middle_click(self, event):
         """Handle middle mouse button press for panning"""
-        if self.current_image:
-            self.middle_drag_start_x = event.x
-            self.middle_drag_start_y = event.y
+        if self.has_page():
+            self.panner.press(event.x, event.y, event.time)
             self.canvas.config(cursor="fleur")  # Hand cursor for panning
             
     def on_middle_drag(self, event):
         """Handle middle mouse button drag for panning"""
-        if self.current_image and hasattr(self, 'middle_drag_start_x'):
-            # Calculate movement delta
-            delta_x = self.middle_drag_start_x - event.x
-            delta_y = self.middle_drag_start_y - event.y
-            
-            # Pan the canvas based on movement
-            if delta_x != 0:
-                self.canvas.xview_scroll(int(delta_x / 10), "units")
-            if delta_y != 0:
-                self.canvas.yview_scroll(int(delta_y / 10), "units")
-                
-            # Update start position for next drag event
-            self.middle_drag_start_x = event.x
-            self.middle_drag_start_y = event.y
+        if self.has_page():
+            # The page follows the pointer exactly, however small the motion
+            self.panner.drag(event.x, event.y, event.time)
             
     def on_middle_release(self, event):
         """Handle middle mouse button release"""
-        if hasattr(self, 'middle_drag_start_x'):
-            del self.middle_drag_start_x
-            del self.middle_drag_start_y
+        self.panner.release(event.time)
         self.canvas.config(cursor="")  # Reset cursor
         
     def on_mouse_wheel(self, event):
         """Handle mouse wheel scrolling"""
-        if not self.current_image:
+        if not self.has_page():
             return
             
         # Determine scroll direction and amount
@@ -2641,7 +5507,7 @@ class Redactor:
         
     def place_signature(self, canvas_x, canvas_y):
         """Place signature at the specified canvas coordinates"""
-        if not self.signatures or not self.current_image:
+        if not self.signatures or not self.has_page():
             return
             
         # Get current signature from dropdown
@@ -2657,9 +5523,6 @@ class Redactor:
         img_x = int(canvas_x / self.zoom_factor)
         img_y = int(canvas_y / self.zoom_factor)
         
-        # Save state for undo before placing signature
-        self.save_image_state()
-        
         # Resize signature to specified size while maintaining aspect ratio
         sig_width, sig_height = signature_image.size
         aspect_ratio = sig_height / sig_width
@@ -2675,32 +5538,19 @@ class Redactor:
         resized_signature = signature_image.resize((target_width, target_height), Image.Resampling.LANCZOS)
         
         # Ensure coordinates are within image bounds
-        img_x = max(0, min(self.current_image.width - target_width, img_x))
-        img_y = max(0, min(self.current_image.height - target_height, img_y))
+        page_width, page_height = self.get_page_size()
+        img_x = max(0, min(page_width - target_width, img_x))
+        img_y = max(0, min(page_height - target_height, img_y))
         
-        # Create a copy of current image to work with
-        result_image = self.current_image.copy().convert('RGBA')
-        
-        # Paste signature with proper alpha blending
-        result_image.paste(resized_signature, (img_x, img_y), resized_signature)
-        
-        # Convert back to RGB if original was RGB
-        if self.current_image.mode == 'RGB':
-            # Create white background and composite
-            background = Image.new('RGB', result_image.size, (255, 255, 255))
-            background.paste(result_image, mask=result_image.split()[-1])
-            result_image = background
-            
-        # Update current image
-        self.current_image = result_image
+        annotation = Annotation('signature', x=img_x, y=img_y, image=resized_signature)
         
         # For PDF files, also add to PDF modifications with signature image data
         if self.is_pdf:
-            # Convert image coordinates to PDF coordinates (account for 2x scaling)
-            pdf_x = img_x / 2.0
-            pdf_y = img_y / 2.0
-            pdf_width = target_width / 2.0
-            pdf_height = target_height / 2.0
+            # Convert image coordinates to PDF coordinates (the page's render scale)
+            transform = self.get_page_transform()
+            pdf_x, pdf_y = transform.to_pdf(img_x, img_y)
+            pdf_width = transform.to_pdf_length(target_width)
+            pdf_height = transform.to_pdf_length(target_height)
             
             # Convert signature image to bytes for storage
             import io
@@ -2713,24 +5563,20 @@ class Redactor:
             print(f"DEBUG: Image coords: ({img_x}, {img_y}) size {target_width}x{target_height}")
             print(f"DEBUG: PDF coords: ({pdf_x}, {pdf_y}) size {pdf_width}x{pdf_height}")
             
-            self.add_pdf_modification('signature', 
-                                    x=pdf_x, y=pdf_y, 
-                                    width=pdf_width, height=pdf_height,
-                                    name=current_signature_name,
-                                    image_data=signature_data)
-            print(f"DEBUG: Total modifications for this page: {len(self.pdf_modifications.get(self.get_pdf_page_key(), []))}")
-        
-        # Mark file as modified
-        self.file_modified = True
-        
-        # Refresh display
-        self.display_image_on_canvas()
+            annotation.pdf_modification = self.make_pdf_modification('signature',
+                                                                     x=pdf_x, y=pdf_y,
+                                                                     width=pdf_width, height=pdf_height,
+                                                                     name=current_signature_name,
+                                                                     image_data=signature_data)
+            
+        # Drawn over the visible tiles only; the page pixels are left alone until it is saved
+        self.add_annotation(annotation)
         
         self.status_var.set(f"Signature placed at ({img_x},{img_y}) - Size: {target_width}x{target_height}")
-            
+        
     def apply_redaction(self, x1, y1, x2, y2):
         """Apply redaction to the image"""
-        if not self.current_image:
+        if not self.has_page():
             return
             
         # Convert canvas coordinates to image coordinates
@@ -2741,10 +5587,11 @@ class Redactor:
         img_y2 = round(y2 / self.zoom_factor)
         
         # Ensure coordinates are within bounds
-        img_x1 = max(0, min(self.current_image.width, img_x1))
-        img_y1 = max(0, min(self.current_image.height, img_y1))
-        img_x2 = max(0, min(self.current_image.width, img_x2))
-        img_y2 = max(0, min(self.current_image.height, img_y2))
+        page_width, page_height = self.get_page_size()
+        img_x1 = max(0, min(page_width, img_x1))
+        img_y1 = max(0, min(page_height, img_y1))
+        img_x2 = max(0, min(page_width, img_x2))
+        img_y2 = max(0, min(page_height, img_y2))
         
         # Ensure proper order
         if img_x1 > img_x2:
@@ -2752,37 +5599,29 @@ class Redactor:
         if img_y1 > img_y2:
             img_y1, img_y2 = img_y2, img_y1
             
-        # Save state for undo before applying redaction
-        self.save_image_state()
-        
-        # Apply redaction to image
-        draw = ImageDraw.Draw(self.current_image)
-        draw.rectangle([img_x1, img_y1, img_x2, img_y2], fill=self.redaction_color)
+        annotation = Annotation('redaction', x1=img_x1, y1=img_y1, x2=img_x2, y2=img_y2,
+                                color=self.redaction_color)
         
         # If this is a PDF, also store the modification for direct PDF editing
         if self.is_pdf:
             # Convert image coordinates back to PDF coordinates
-            # PDF coordinates need to account for the 2x scaling we used in load_pdf_page
-            pdf_x1 = img_x1 / 2.0
-            pdf_y1 = img_y1 / 2.0  
-            pdf_x2 = img_x2 / 2.0
-            pdf_y2 = img_y2 / 2.0
+            # (the page was rasterized at its own scale, see page_render_scale)
+            transform = self.get_page_transform()
+            pdf_x1, pdf_y1 = transform.to_pdf(img_x1, img_y1)
+            pdf_x2, pdf_y2 = transform.to_pdf(img_x2, img_y2)
             
-            self.add_pdf_modification('redaction', 
-                                    x1=pdf_x1, y1=pdf_y1, x2=pdf_x2, y2=pdf_y2, 
-                                    color=self.redaction_color)
-        
-        # Mark file as modified
-        self.file_modified = True
-        
-        # Refresh display
-        self.display_image_on_canvas()
+            annotation.pdf_modification = self.make_pdf_modification('redaction',
+                                                                     x1=pdf_x1, y1=pdf_y1, x2=pdf_x2, y2=pdf_y2,
+                                                                     color=self.redaction_color)
+            
+        # Drawn over the visible tiles only; the page pixels are left alone until it is saved
+        self.add_annotation(annotation)
         
         self.status_var.set(f"Redaction applied at ({img_x1},{img_y1}) to ({img_x2},{img_y2})")
-    
+        
     def apply_highlight(self, x1, y1, x2, y2):
         """Apply semi-transparent highlight to the image"""
-        if not self.current_image:
+        if not self.has_page():
             return
             
         # Convert canvas coordinates to image coordinates
@@ -2792,10 +5631,11 @@ class Redactor:
         img_y2 = round(y2 / self.zoom_factor)
         
         # Ensure coordinates are within bounds
-        img_x1 = max(0, min(self.current_image.width, img_x1))
-        img_y1 = max(0, min(self.current_image.height, img_y1))
-        img_x2 = max(0, min(self.current_image.width, img_x2))
-        img_y2 = max(0, min(self.current_image.height, img_y2))
+        page_width, page_height = self.get_page_size()
+        img_x1 = max(0, min(page_width, img_x1))
+        img_y1 = max(0, min(page_height, img_y1))
+        img_x2 = max(0, min(page_width, img_x2))
+        img_y2 = max(0, min(page_height, img_y2))
         
         # Ensure proper order
         if img_x1 > img_x2:
@@ -2803,50 +5643,29 @@ class Redactor:
         if img_y1 > img_y2:
             img_y1, img_y2 = img_y2, img_y1
             
-        # Save state for undo before applying highlight
-        self.save_image_state()
-        
-        # Create a transparent overlay for the highlight
-        overlay = Image.new('RGBA', self.current_image.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Convert hex color to RGBA with opacity
-        hex_color = self.highlight_color.lstrip('#')
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-        alpha = int(self.highlight_opacity * 255)
-        
-        draw.rectangle([img_x1, img_y1, img_x2, img_y2], fill=(r, g, b, alpha))
-        
-        # Composite the overlay onto the current image
-        if self.current_image.mode != 'RGBA':
-            self.current_image = self.current_image.convert('RGBA')
-        self.current_image = Image.alpha_composite(self.current_image, overlay)
+        annotation = Annotation('highlight', x1=img_x1, y1=img_y1, x2=img_x2, y2=img_y2,
+                                color=self.highlight_color, opacity=self.highlight_opacity)
         
         # If this is a PDF, also store the modification for direct PDF editing
         if self.is_pdf:
             # Convert image coordinates back to PDF coordinates
-            pdf_x1 = img_x1 / 2.0
-            pdf_y1 = img_y1 / 2.0  
-            pdf_x2 = img_x2 / 2.0
-            pdf_y2 = img_y2 / 2.0
+            transform = self.get_page_transform()
+            pdf_x1, pdf_y1 = transform.to_pdf(img_x1, img_y1)
+            pdf_x2, pdf_y2 = transform.to_pdf(img_x2, img_y2)
             
-            self.add_pdf_modification('highlight', 
-                                    x1=pdf_x1, y1=pdf_y1, x2=pdf_x2, y2=pdf_y2, 
-                                    color=self.highlight_color, opacity=self.highlight_opacity)
-        
-        # Mark file as modified
-        self.file_modified = True
-        
-        # Refresh display
-        self.display_image_on_canvas()
+            annotation.pdf_modification = self.make_pdf_modification('highlight',
+                                                                     x1=pdf_x1, y1=pdf_y1, x2=pdf_x2, y2=pdf_y2,
+                                                                     color=self.highlight_color,
+                                                                     opacity=self.highlight_opacity)
+            
+        # Drawn over the visible tiles only; the page pixels are left alone until it is saved
+        self.add_annotation(annotation)
         
         self.status_var.set(f"Highlight applied at ({img_x1},{img_y1}) to ({img_x2},{img_y2})")
         
     def add_text(self, canvas_x, canvas_y, text):
         """Add text to the image"""
-        if not self.current_image:
+        if not self.has_page():
             return
             
         # Convert canvas coordinates to image coordinates
@@ -2854,48 +5673,30 @@ class Redactor:
         img_y = int(canvas_y / self.zoom_factor)
         
         # Use the exact text size from spinbox - no scaling, no bullshit
-        try:
-            # Try to load a system font
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", self.text_size)
-        except:
-            try:
-                # Fallback to default font
-                font = ImageFont.load_default()
-            except:
-                font = None
-                
-        # Save state for undo before adding text
-        self.save_image_state()
-        
-        # Add text to image
-        draw = ImageDraw.Draw(self.current_image)
-        draw.text((img_x, img_y), text, fill=self.text_color, font=font)
+        annotation = Annotation('text', x=img_x, y=img_y, text=text, color=self.text_color, size=self.text_size)
         
         # If this is a PDF, also store the modification for direct PDF editing
         if self.is_pdf:
             # Convert image coordinates back to PDF coordinates
-            # PDF coordinates need to account for the 2x scaling we used in load_pdf_page
-            pdf_x = img_x / 2.0
-            pdf_y = img_y / 2.0
+            # (the page was rasterized at its own scale, see page_render_scale)
+            transform = self.get_page_transform()
+            pdf_x, pdf_y = transform.to_pdf(img_x, img_y)
             
-            # Font size also needs to be divided by 2 to match the coordinate scaling
-            pdf_font_size = self.text_size / 2.0
+            # Font size is scaled the same way as the coordinates
+            pdf_font_size = transform.to_pdf_length(self.text_size)
             
-            self.add_pdf_modification('text', 
-                                    x=pdf_x, y=pdf_y, text=text,
-                                    color=self.text_color, size=pdf_font_size)
-        
-        # Mark file as modified
-        self.file_modified = True
-        
-        # Refresh display
-        self.display_image_on_canvas()
+            annotation.pdf_modification = self.make_pdf_modification('text',
+                                                                     x=pdf_x, y=pdf_y, text=text,
+                                                                     color=self.text_color, size=pdf_font_size)
+            
+        # Drawn over the visible tiles only; the page pixels are left alone until it is saved
+        self.add_annotation(annotation)
         
         self.status_var.set(f"Added text '{text}' at ({img_x},{img_y})")
-    
+        
     def extract_text_from_region(self, x1, y1, x2, y2):
         """Extract text from selected region using OCR and copy to clipboard"""
-        if not self.current_image:
+        if not self.has_page():
             return
         
         if not PYTESSERACT_AVAILABLE:
@@ -2910,10 +5711,11 @@ class Redactor:
             img_y2 = int(y2 / self.zoom_factor)
             
             # Ensure coordinates are within bounds
-            img_x1 = max(0, min(self.current_image.width, img_x1))
-            img_y1 = max(0, min(self.current_image.height, img_y1))
-            img_x2 = max(0, min(self.current_image.width, img_x2))
-            img_y2 = max(0, min(self.current_image.height, img_y2))
+            page_width, page_height = self.get_page_size()
+            img_x1 = max(0, min(page_width, img_x1))
+            img_y1 = max(0, min(page_height, img_y1))
+            img_x2 = max(0, min(page_width, img_x2))
+            img_y2 = max(0, min(page_height, img_y2))
             
             # Ensure proper order
             if img_x1 > img_x2:
@@ -2926,8 +5728,8 @@ class Redactor:
                 self.status_var.set("Selected region is too small")
                 return
             
-            # Crop the selected region from the current image
-            cropped_region = self.current_image.crop((img_x1, img_y1, img_x2, img_y2))
+            # Crop the selected region with its annotations (PDF pages render just this clip)
+            cropped_region = self.crop_page_region((img_x1, img_y1, img_x2, img_y2))
             
             # Perform OCR on the cropped region
             self.status_var.set("Performing OCR...")
@@ -2964,17 +5766,22 @@ class Redactor:
         
     def prev_page(self):
         """Go to previous PDF page"""
-        if self.is_pdf and self.ensure_pdf_document_open() and self.current_page > 0:
-            self.current_page -= 1
-            self.page_var.set(str(self.current_page + 1))
-            self.load_pdf_page()
+        self.request_page_step(-1)
             
     def next_page(self):
         """Go to next PDF page"""
-        if self.is_pdf and self.ensure_pdf_document_open() and self.current_page < self.total_pages - 1:
-            self.current_page += 1
-            self.page_var.set(str(self.current_page + 1))
-            self.load_pdf_page()
+        self.request_page_step(1)
+        
+    def request_page_step(self, step):
+        """Queue a move of step pages, rendering only the page a burst of presses ends on"""
+        if 'file_index' in self.view_target:
+            self.apply_view_update()  # Pages are counted in the file being switched to
+        if not self.is_pdf or not self.ensure_pdf_document_open():
+            return
+        page = self.view_target.get('page', self.current_page) + step
+        if 0 <= page < self.total_pages:
+            self.request_view_update(page=page)
+            self.page_var.set(str(page + 1))
             
     def goto_page(self, event=None):
         """Go to specific page"""
@@ -2984,6 +5791,8 @@ class Redactor:
         try:
             page_num = int(self.page_var.get()) - 1
             if 0 <= page_num < self.total_pages:
+                # Pages queued around the old position are no longer useful
+                self.page_prefetcher.cancel()
                 self.current_page = page_num
                 self.load_pdf_page()
             else:
@@ -2993,28 +5802,24 @@ class Redactor:
             
     def zoom_in(self):
         """Zoom in"""
-        self.zoom_factor *= 1.25
-        # Save zoom level for current file
-        if self.current_file:
-            self.file_zoom_levels[self.current_file] = self.zoom_factor
-            self.save_zoom_settings()  # Save to persistent storage
-        self.display_image_on_canvas()
-        self.status_var.set(f"Zoom: {self.zoom_factor:.1f}x")
+        self.request_zoom(1.25)
         
     def zoom_out(self):
         """Zoom out"""
-        self.zoom_factor /= 1.25
-        if self.zoom_factor < 0.1:
-            self.zoom_factor = 0.1
-        # Save zoom level for current file
-        if self.current_file:
-            self.file_zoom_levels[self.current_file] = self.zoom_factor
-            self.save_zoom_settings()  # Save to persistent storage
-        self.display_image_on_canvas()
-        self.status_var.set(f"Zoom: {self.zoom_factor:.1f}x")
+        self.request_zoom(1 / 1.25)
+        
+    def request_zoom(self, factor):
+        """Queue a zoom change, rendering only the zoom a burst of presses ends on"""
+        if 'file_index' in self.view_target:
+            self.apply_view_update()  # Zoom the file being switched to
+        zoom = max(0.1, self.view_target.get('zoom', self.zoom_factor) * factor)
+        self.set_fit_mode(None)  # An explicit zoom stops following the window size
+        self.request_view_update(zoom=zoom)
+        self.status_var.set(f"Zoom: {zoom:.1f}x")
         
     def reset_zoom(self):
         """Reset zoom to default"""
+        self.set_fit_mode(None)
         self.zoom_factor = self.default_zoom
         # Save zoom level for current file
         if self.current_file:
@@ -3025,6 +5830,7 @@ class Redactor:
         
     def reset_zoom_100(self):
         """Reset zoom to 100% (1.0x)"""
+        self.set_fit_mode(None)
         self.zoom_factor = 1.0
         # Save zoom level for current file
         if self.current_file:
@@ -3035,15 +5841,16 @@ class Redactor:
         
     def fit_to_window(self):
         """Fit image to window"""
-        if not self.current_image:
+        if not self.has_page():
             return
             
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         
         if canvas_width > 1 and canvas_height > 1:
-            zoom_x = canvas_width / self.current_image.width
-            zoom_y = canvas_height / self.current_image.height
+            page_width, page_height = self.get_page_size()
+            zoom_x = canvas_width / page_width
+            zoom_y = canvas_height / page_height
             self.zoom_factor = min(zoom_x, zoom_y) * 0.9  # 90% to leave some margin
             
             # Save zoom level for current file
@@ -3065,6 +5872,7 @@ class Redactor:
         
     def load_default_zoom(self):
         """Load saved default zoom level"""
+        self.set_fit_mode(None)
         self.zoom_factor = self.default_zoom
         # Save zoom level for current file
         if self.current_file:
@@ -3075,26 +5883,30 @@ class Redactor:
         
     def pan_up(self):
         """Pan the view up"""
-        if self.current_image:
-            self.canvas.yview_scroll(-1, "units")
+        if self.has_page():
+            self.panner.stop()
+            self.panner.scroll_by(0, -self.pan_step)
             self.status_var.set("Panned up")
             
     def pan_down(self):
         """Pan the view down"""
-        if self.current_image:
-            self.canvas.yview_scroll(1, "units")
+        if self.has_page():
+            self.panner.stop()
+            self.panner.scroll_by(0, self.pan_step)
             self.status_var.set("Panned down")
             
     def pan_left(self):
         """Pan the view left"""
-        if self.current_image:
-            self.canvas.xview_scroll(-1, "units")
+        if self.has_page():
+            self.panner.stop()
+            self.panner.scroll_by(-self.pan_step, 0)
             self.status_var.set("Panned left")
             
     def pan_right(self):
         """Pan the view right"""
-        if self.current_image:
-            self.canvas.xview_scroll(1, "units")
+        if self.has_page():
+            self.panner.stop()
+            self.panner.scroll_by(self.pan_step, 0)
             self.status_var.set("Panned right")
         
     def save_zoom_settings(self):
@@ -3110,7 +5922,8 @@ class Redactor:
             
             config = {
                 "default_zoom": self.default_zoom,
-                "file_zoom_levels": self.file_zoom_levels
+                "file_zoom_levels": self.file_zoom_levels,
+                "file_fit_modes": self.file_fit_modes
             }
             with open(config_file, 'w') as f:
                 json.dump(config, f, indent=2)
@@ -3129,6 +5942,7 @@ class Redactor:
                     self.default_zoom = config.get("default_zoom", 1.0)
                     # Load per-file zoom levels
                     self.file_zoom_levels = config.get("file_zoom_levels", {})
+                    self.file_fit_modes = config.get("file_fit_modes", {})
                     # Only set current zoom to default on app startup, not every time settings are loaded
                     if not hasattr(self, '_zoom_initialized'):
                         self.zoom_factor = self.default_zoom  # Start with saved default on first load only
@@ -3137,6 +5951,160 @@ class Redactor:
         except Exception as e:
             print(f"Could not load zoom settings: {e}")
             
+    def load_performance_settings(self):
+        """Load rendering performance settings from config file"""
+        try:
+            config_file = os.path.expanduser("~/.config/redactor/performance.json")
+            if os.path.exists(config_file):
+                with open(config_file, 'r') as f:
+                    config = json.load(f)
+                    self.page_cache_mb = int(config.get("page_cache_mb", self.page_cache_mb))
+                    self.prefetch_window = int(config.get("prefetch_window", self.prefetch_window))
+                    self.file_prefetch_window = int(config.get("file_prefetch_window", self.file_prefetch_window))
+                    self.render_processes = config.get("render_processes", self.render_processes)
+                    self.display_list_mb = int(config.get("display_list_mb", self.display_list_mb))
+                    self.render_megapixels = float(config.get("render_megapixels", self.render_megapixels))
+                    self.color_mode = config.get("color_mode", self.color_mode)
+                    self.continuous_scroll = bool(config.get("continuous_scroll", self.continuous_scroll))
+                    self.show_page_thumbnails = bool(config.get("page_thumbnails", self.show_page_thumbnails))
+                    self.disk_cache_enabled = bool(config.get("disk_cache_enabled", self.disk_cache_enabled))
+                    self.disk_cache_mb = int(config.get("disk_cache_mb", self.disk_cache_mb))
+                    self.disk_cache_encrypted = bool(config.get("disk_cache_encrypted", self.disk_cache_encrypted))
+                    self.thumbnail_cache_mb = int(config.get("thumbnail_cache_mb", self.thumbnail_cache_mb))
+        except Exception as e:
+            print(f"Could not load performance settings: {e}")
+            
+    def save_performance_settings(self):
+        """Save rendering performance settings to config file"""
+        try:
+            config_dir = os.path.expanduser("~/.config/redactor")
+            os.makedirs(config_dir, exist_ok=True)
+            config_file = os.path.join(config_dir, "performance.json")
+            
+            config = {
+                "page_cache_mb": self.page_cache_mb,
+                "prefetch_window": self.prefetch_window,
+                "file_prefetch_window": self.file_prefetch_window,
+                "render_processes": self.render_processes,
+                "display_list_mb": self.display_list_mb,
+                "render_megapixels": self.render_megapixels,
+                "color_mode": self.color_mode,
+                "continuous_scroll": self.continuous_scroll,
+                "page_thumbnails": self.show_page_thumbnails,
+                "disk_cache_enabled": self.disk_cache_enabled,
+                "disk_cache_mb": self.disk_cache_mb,
+                "disk_cache_encrypted": self.disk_cache_encrypted,
+                "thumbnail_cache_mb": self.thumbnail_cache_mb
+            }
+            with open(config_file, 'w') as f:
+                json.dump(config, f, indent=2)
+        except Exception as e:
+            print(f"Could not save performance settings: {e}")
+            
+    def show_render_cache_stats(self):
+        """Show render cache size, hits, misses and evictions in the status bar"""
+        self.status_var.set(f"{self.page_cache.stats_text()}; {self.display_lists.stats_text()}")
+        
+    def set_render_cache_size(self):
+        """Ask for a new render cache memory budget"""
+        size_mb = simpledialog.askinteger("Render Cache Size", "Memory budget for rendered pages (MB):",
+                                          initialvalue=self.page_cache_mb, minvalue=0, maxvalue=65536)
+        if size_mb is None:
+            return
+        self.page_cache_mb = size_mb
+        self.page_cache.set_budget(size_mb * 1024 * 1024)
+        self.save_performance_settings()
+        self.show_render_cache_stats()
+        
+    def set_render_pixel_budget(self):
+        """Ask for the largest edit buffer (in megapixels) a PDF page may be rasterized to"""
+        if any(modifications.dirty_pages() for modifications in self.modifications.values()):
+            # Unsaved annotations are placed in edit-buffer pixels of the current render scale
+            messagebox.showinfo("Page Pixel Budget", "Save your edits first - the budget changes the page scale.")
+            return
+        megapixels = simpledialog.askinteger("Page Pixel Budget",
+                                             "Largest rasterized PDF page (megapixels, 4 bytes each):",
+                                             initialvalue=int(self.render_megapixels), minvalue=1, maxvalue=1000)
+        if megapixels is None:
+            return
+        self.render_megapixels = megapixels
+        self.save_performance_settings()
+        # The strip laid out every page at the old scale
+        self.document_strip = None
+        if self.is_pdf and self.current_file:
+            self.load_pdf_page()
+        self.status_var.set(f"PDF pages render at up to {megapixels} megapixels")
+        
+    def on_color_mode_menu(self):
+        """Switch between color, grayscale and auto-detected page buffers"""
+        mode = self.color_mode_var.get()
+        if mode == self.color_mode:
+            return
+        self.color_mode = mode
+        self.save_performance_settings()
+        # Cached renders and decodes were made under the old mode
+        self.page_cache.clear()
+        if self.page_cache.disk is not None:
+            self.page_cache.disk.clear()
+        self.page_prefetcher.cancel()
+        self.file_prefetcher.cancel()
+        self.document_strip = None
+        self.status_var.set(f"Page color mode: {mode} (from the next file or page load)")
+        
+    def apply_disk_cache_settings(self):
+        """Attach, reconfigure or detach the disk render cache according to the settings"""
+        if not self.disk_cache_enabled:
+            if self.page_cache.disk is not None:
+                self.page_cache.disk.save_index()
+                self.page_cache.disk = None
+            return
+        if self.page_cache.disk is None:
+            self.page_cache.disk = DiskRenderCache(os.path.expanduser("~/.config/redactor/render_cache"),
+                                                   self.disk_cache_mb * 1024 * 1024)
+        self.page_cache.disk.allow_encrypted = self.disk_cache_encrypted
+        self.page_cache.disk.set_budget(self.disk_cache_mb * 1024 * 1024)
+        
+    def toggle_disk_cache(self):
+        """Turn the disk render cache on or off"""
+        self.disk_cache_enabled = self.disk_cache_var.get()
+        self.apply_disk_cache_settings()
+        self.save_performance_settings()
+        self.status_var.set(f"Disk render cache {'enabled' if self.disk_cache_enabled else 'disabled'}")
+        
+    def toggle_disk_cache_encrypted(self):
+        """Allow or forbid storing pages of encrypted PDFs in the disk cache"""
+        if self.disk_cache_encrypted_var.get():
+            confirmed = messagebox.askyesno(
+                "Cache Encrypted PDFs",
+                "Pages of password-protected PDFs will be stored DECRYPTED in\n"
+                "~/.config/redactor/render_cache.\n\nAnyone with access to your account can read them. Continue?",
+                icon="warning")
+            if not confirmed:
+                self.disk_cache_encrypted_var.set(False)
+                return
+        self.disk_cache_encrypted = self.disk_cache_encrypted_var.get()
+        self.apply_disk_cache_settings()
+        self.save_performance_settings()
+        
+    def set_disk_cache_size(self):
+        """Ask for a new disk render cache size cap"""
+        size_mb = simpledialog.askinteger("Disk Cache Size", "Disk space for rendered pages (MB):",
+                                          initialvalue=self.disk_cache_mb, minvalue=0, maxvalue=1048576)
+        if size_mb is None:
+            return
+        self.disk_cache_mb = size_mb
+        self.apply_disk_cache_settings()
+        self.save_performance_settings()
+        self.show_render_cache_stats()
+        
+    def clear_disk_cache(self):
+        """Delete every page stored in the disk render cache"""
+        if self.page_cache.disk is None:
+            DiskRenderCache(os.path.expanduser("~/.config/redactor/render_cache"), 0).clear()
+        else:
+            self.page_cache.disk.clear()
+        self.status_var.set("Disk render cache cleared")
+        
     def load_recent_files(self):
         """Load recent files list from config file"""
         try:
@@ -3280,7 +6248,7 @@ class Redactor:
             
     def save_file_overwrite(self):
         """Save the current file, overwriting the original"""
-        if not self.current_image or not self.current_file:
+        if not self.has_page() or not self.current_file:
             messagebox.showwarning("Warning", "No file loaded to save")
             return False
             
@@ -3298,7 +6266,8 @@ class Redactor:
             else:
                 # For images, overwrite the original
                 save_path = self.current_file
-                self.current_image.save(save_path, quality=95)
+                self.image_for_save().save(save_path, quality=95)
+                self.mark_file_changed_on_disk(save_path)
                 self.status_var.set(f"Overwritten: {os.path.basename(save_path)}")
                 
                 # Reset modification flag after successful save
@@ -3312,7 +6281,7 @@ class Redactor:
             
     def save_file(self):
         """Save the current file with _redacted suffix"""
-        if not self.current_image or not self.current_file:
+        if not self.has_page() or not self.current_file:
             messagebox.showwarning("Warning", "No file loaded to save")
             return
             
@@ -3329,7 +6298,7 @@ class Redactor:
                 return
             else:
                 # For images, save with _redacted suffix to preserve original
-                self.current_image.save(save_path, quality=95)
+                self.image_for_save().save(save_path, quality=95)
                 self.status_var.set(f"Saved: {os.path.basename(save_path)}")
             
         except Exception as e:
@@ -3337,7 +6306,7 @@ class Redactor:
             
     def save_as_file(self):
         """Save the current file with a new name"""
-        if not self.current_image:
+        if not self.has_page():
             messagebox.showwarning("Warning", "No file loaded to save")
             return
         
@@ -3382,12 +6351,15 @@ class Redactor:
                             self.status_var.set(f"PDF saved as: {os.path.basename(filename)}")
                     else:
                         # If current file is an image, convert to PDF
-                        self.current_image.save(filename, "PDF", quality=95, resolution=100.0)
+                        image = self.image_for_save()
+                        # A JPEG quality is rejected for bilevel pages, which aren't stored as JPEG anyway
+                        options = {} if image.mode == '1' else {'quality': 95}
+                        image.save(filename, "PDF", resolution=100.0, **options)
                         self.save_last_directory(filename)
                         self.status_var.set(f"Saved as PDF: {os.path.basename(filename)}")
                 else:
                     # Save as image (PNG/JPEG)
-                    self.current_image.save(filename, quality=95)
+                    self.image_for_save().save(filename, quality=95)
                     self.save_last_directory(filename)
                     self.status_var.set(f"Saved: {os.path.basename(filename)}")
             except Exception as e:
@@ -3418,6 +6390,11 @@ class Redactor:
             # Save all zoom settings to file
             self.save_zoom_settings()
             
+            # Stop the render worker processes and remember what the disk cache holds
+            self.render_engine.shutdown()
+            if self.page_cache.disk is not None:
+                self.page_cache.disk.save_index()
+            
             # Close the application
             self.root.destroy()
         except Exception as e: